@@ -0,0 +1,185 @@
+# Benchmarks for dumb25519 and the schemes built on it
+#
+# Run `python3 benchmark.py --output results.json` to time every case and save the
+# results as JSON. Add `--baseline old.json` to compare against an earlier run: any
+# case slower than the baseline by more than `--threshold` (a fraction) is reported
+# as a regression, and the exit status is 1.
+#
+# Inputs are derived from a fixed seed, so repeated runs time the same work.
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import dumb25519
+from elgamal import ElgamalPrivateKey
+from feldman_vss import FeldmanVSS
+
+MULTIEXP_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+QUICK_MULTIEXP_SIZES = [1, 4, 16, 64, 256]
+VSS_SIZES = [(10, 7), (100, 67)]   # (n, m)
+QUICK_VSS_SIZES = [(10, 7)]
+
+# Deterministic inputs
+class Inputs:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.counter = 0
+
+    def scalar(self):
+        return dumb25519.Scalar(self.rng.randrange(1, dumb25519.l))
+
+    def scalars(self, n):
+        return dumb25519.ScalarVector([self.scalar() for _ in range(n)])
+
+    def point(self):
+        self.counter += 1
+        return dumb25519.hash_to_point_fast('benchmark', self.counter)
+
+    def points(self, n):
+        points = dumb25519.hash_to_points([('benchmark', self.counter + i) for i in range(1, n + 1)])
+        self.counter += n
+        return points
+
+# Time `function` as the best of `repeat` runs; each run calls it enough times to last `min_time`
+def measure(function, repeat, min_time):
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, time.perf_counter() - start)
+    return {'seconds_per_op': best / number, 'ops': number}
+
+# All benchmark cases, as (name, function) pairs
+def cases(inputs, quick):
+    s, t = inputs.scalar(), inputs.scalar()
+    P, Q = inputs.point(), inputs.point()
+    P_hex, s_hex = repr(P), repr(s)
+    P_bytes = P.to_bytes()
+    PQ = P + Q   # projective, so encoding needs an inversion
+
+    yield 'scalar_add', lambda: s + t
+    yield 'scalar_mul', lambda: s * t
+    yield 'scalar_invert', lambda: s.invert()
+    yield 'scalar_encode', lambda: repr(dumb25519.Scalar(s.x))
+    yield 'scalar_decode', lambda: dumb25519.Scalar(s_hex)
+    yield 'point_add', lambda: P + Q
+    yield 'point_sub', lambda: P - Q
+    yield 'point_mul', lambda: s * P
+    yield 'point_mul_G', lambda: s * dumb25519.G
+    yield 'point_encode', lambda: dumb25519.Point.from_extended(PQ.ext).to_bytes()
+    yield 'point_decode', lambda: dumb25519.Point(P_hex)
+    yield 'point_from_bytes', lambda: dumb25519.Point.from_bytes(P_bytes)
+    yield 'point_in_subgroup', lambda: P.in_subgroup()
+
+    yield 'hash_to_point', lambda: dumb25519.hash_to_point('benchmark', 1)
+    yield 'hash_to_point_fast', lambda: dumb25519.hash_to_point_fast('benchmark', 1)
+    yield 'hash_to_scalar', lambda: dumb25519.hash_to_scalar('benchmark', P)
+
+    for n in QUICK_MULTIEXP_SIZES if quick else MULTIEXP_SIZES:
+        scalars, points = inputs.scalars(n), inputs.points(n)
+        yield 'multiexp_%d' % n, lambda scalars=scalars, points=points: dumb25519.multiexp(scalars, points)
+
+    for n in [16, 256] if quick else [16, 256, 4096]:
+        scalars = inputs.scalars(n)
+        yield 'scalarvector_invert_%d' % n, lambda scalars=scalars: scalars.invert()
+
+    key = ElgamalPrivateKey(inputs.scalar())
+    public = key.get_public()
+    cipher = public.encrypt(P)
+    yield 'elgamal_encrypt', lambda: public.encrypt(P)
+    yield 'elgamal_decrypt', lambda: key.decrypt(cipher)
+    messages = list(inputs.points(64))
+    ciphers = public.encrypt_many(messages)
+    yield 'elgamal_encrypt_many_64', lambda: public.encrypt_many(messages)
+    yield 'elgamal_decrypt_many_64', lambda: key.decrypt_many(ciphers)
+
+    vss = FeldmanVSS()
+    for n, m in QUICK_VSS_SIZES if quick else VSS_SIZES:
+        players = [dumb25519.Scalar(i) for i in range(1, n + 1)]
+        secret = inputs.scalar()
+        shares, V_list = vss.generate(secret, players, m)
+        yield 'vss_generate_%d_%d' % (n, m), lambda secret=secret, players=players, m=m: vss.generate(secret, players, m)
+        yield 'vss_verify_%d_%d' % (n, m), lambda V_list=V_list, players=players, shares=shares: vss.verify(players[0], shares[0], V_list)
+        yield 'vss_verify_batch_%d_%d' % (n, m), lambda V_list=V_list, players=players, shares=shares: vss.verify_batch(players, shares, V_list)
+        yield 'vss_recover_%d_%d' % (n, m), lambda players=players, shares=shares, m=m: vss.recover(players[:m], shares[:m])
+
+# Run the cases whose names contain `pattern`
+def run(seed=0, quick=False, repeat=3, min_time=0.2, pattern=None, log=None):
+    results = {}
+    for name, function in cases(Inputs(seed), quick):
+        if pattern is not None and pattern not in name:
+            continue
+        results[name] = measure(function, repeat, min_time)
+        if log is not None:
+            log('%-32s %12.3f us' % (name, results[name]['seconds_per_op'] * 1e6))
+    return {
+        'format': 1,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'quick': quick,
+        'results': results,
+    }
+
+# Compare results against a baseline; returns (regressions, comparisons) where each
+# entry is (name, baseline seconds, current seconds, ratio)
+def compare(current, baseline, threshold):
+    comparisons = []
+    regressions = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        old = baseline['results'][name]['seconds_per_op']
+        new = result['seconds_per_op']
+        entry = (name, old, new, new / old)
+        comparisons.append(entry)
+        if new > old * (1 + threshold):
+            regressions.append(entry)
+    return regressions, comparisons
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dumb25519, Elgamal and Feldman VSS')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed slowdown as a fraction (default 0.10)')
+    parser.add_argument('--quick', action='store_true', help='smaller sizes only')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case; the best is kept (default 3)')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per run (default 0.2)')
+    parser.add_argument('--filter', help='only run cases whose name contains this')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    current = run(args.seed, args.quick, args.repeat, args.min_time, args.filter, log=print)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions, comparisons = compare(current, baseline, args.threshold)
+        print()
+        for name, old, new, ratio in comparisons:
+            flag = '  REGRESSION' if (name, old, new, ratio) in regressions else ''
+            print('%-32s %8.3fx%s' % (name, ratio, flag))
+        if regressions:
+            print('\n%d regression(s) over %.0f%%' % (len(regressions), args.threshold * 100))
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,8 +4,15 @@
 # -- putting this code into production would be dumb
 # -- assuming this code is secure would also be dumb
 
+import json
+import mmap
+import os
 import secrets
-from hashlib import blake2s
+import struct
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import blake2b, blake2s
 
 # Curve parameters
 q = 2**255 - 19
@@ -13,19 +20,35 @@ l = 2**252 + 27742317777372353535851937790883648493
 cofactor = 8
 b = 256 # bit length
 
+# The innermost active Profile, if any (see `profile`); every hook checks this
+# first, so instrumentation costs a single global lookup while it is off
+profiler = None
+
 # Internal helper methods
 def exponent(b,e,m):
     return pow(b,e,m)
 
 def invert(x,p):
     # Assumes `p` is prime
+    if profiler is not None:
+        return profiler.call('invert',exponent,x,p-2,p)
     return exponent(x,p-2,p)
 
+# Square root of u/v with a single exponentiation; returns (is_square, root)
+# If u/v is not a square, the root is meaningless
+def sqrt_ratio(u,v):
+    v3 = v*v*v % q
+    x = u*v3 * exponent(u*v3*v3*v,(q-5)//8,q) % q
+    check = v*x*x % q
+    if check == u % q:
+        return True, x
+    if check == -u % q:
+        return True, x*I % q
+    return False, x
+
 def xfromy(y):
-    temp = (y*y-1) * invert(d*y*y+1,q)
-    x = exponent(temp,(q+3)//8,q)
-    if (x*x - temp) % q != 0:
-        x = (x*I) % q
+    yy = y*y
+    _, x = sqrt_ratio(yy-1,d*yy+1)
     if x % 2 != 0:
         x = q-x
     return x
@@ -33,11 +56,162 @@ def xfromy(y):
 def bit(h,i):
     return (int(h[i//8]) >> (i%8)) & 1
 
-d = -121665 * invert(121666,q)
-I = exponent(2,(q-1)//4,q)
+# Invert many nonzero field elements at the cost of a single inversion
+def invert_many(xs,p):
+    n = len(xs)
+    if n == 0:
+        return []
+    if profiler is not None:
+        start = time.perf_counter()
+    scratch = [1]*n
+    acc = 1
+    for i in range(n):
+        scratch[i] = acc
+        acc = acc*xs[i] % p
+    acc = invert(acc,p)
+    result = [0]*n
+    for i in range(n-1,-1,-1):
+        result[i] = acc*scratch[i] % p
+        acc = acc*xs[i] % p
+    if profiler is not None:
+        profiler.record('invert_many',start,n)
+    return result
+
+# Extended twisted Edwards coordinates: a point is a tuple (X,Y,Z,T) with
+# x = X/Z, y = Y/Z and x*y = T/Z; none of these operations need an inversion
+
+# Addition (unified, complete for a = -1 and nonsquare d)
+def ext_add(P,Q):
+    X1,Y1,Z1,T1 = P
+    X2,Y2,Z2,T2 = Q
+    a = (Y1-X1)*(Y2-X2) % q
+    b = (Y1+X1)*(Y2+X2) % q
+    c = T1*d2*T2 % q
+    e = 2*Z1*Z2 % q
+    f = b-a
+    g = e-c
+    h = e+c
+    k = b+a
+    return (f*g % q, h*k % q, g*h % q, f*k % q)
+
+# Doubling
+def ext_double(P):
+    X1,Y1,Z1,_ = P
+    a = X1*X1 % q
+    b = Y1*Y1 % q
+    c = 2*Z1*Z1 % q
+    e = (X1+Y1)*(X1+Y1) - a - b
+    g = b-a
+    f = g-c
+    h = -a-b
+    return (e*f % q, g*h % q, f*g % q, e*h % q)
+
+# Identity test
+def ext_is_identity(P):
+    X,Y,Z,_ = P
+    return X % q == 0 and (Y-Z) % q == 0
+
+# Negation
+def ext_neg(P):
+    X,Y,Z,T = P
+    return (-X % q, Y, Z, -T % q)
+
+# Affine Niels form (y+x, y-x, 2*d*x*y) of a point with Z = 1, for mixed addition
+def ext_to_niels(P):
+    X,Y,_,T = P
+    return ((Y+X) % q, (Y-X) % q, d2*T % q)
+
+# Mixed addition of a point in affine Niels form
+def ext_madd(P,N):
+    X1,Y1,Z1,T1 = P
+    a = (Y1-X1)*N[1] % q
+    b = (Y1+X1)*N[0] % q
+    c = T1*N[2] % q
+    e = 2*Z1
+    f = b-a
+    g = e-c
+    h = e+c
+    k = b+a
+    return (f*g % q, h*k % q, g*h % q, f*k % q)
+
+# Mixed subtraction of a point in affine Niels form
+def ext_msub(P,N):
+    return ext_madd(P,(N[1],N[0],-N[2]))
+
+# Normalize many points in extended coordinates to Z = 1 with a single inversion
+def ext_normalize_many(points):
+    zs = invert_many([P[2] for P in points],q)
+    result = []
+    for P,z in zip(points,zs):
+        x = P[0]*z % q
+        y = P[1]*z % q
+        result.append((x,y,1,x*y % q))
+    return result
+
+# Width-`w` non-adjacent form of a nonnegative integer, least significant digit first
+# Every nonzero digit is odd with absolute value below 2**(w-1)
+def wnaf(k,w):
+    digits = []
+    half = 1 << (w-1)
+    full = 1 << w
+    while k > 0:
+        if k & 1:
+            digit = k & (full-1)
+            if digit >= half:
+                digit -= full
+            k -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        k >>= 1
+    return digits
+
+# Table of odd multiples P, 3P, ..., (2**(w-1)-1)P, along with their negations
+def ext_odd_multiples(P,w):
+    P2 = ext_double(P)
+    table = [P]
+    for i in range(1,1 << (w-2)):
+        table.append(ext_add(table[-1],P2))
+    return table, [ext_neg(T) for T in table]
+
+# Variable-base scalar multiplication by a nonnegative integer using wNAF
+def ext_mul(P,k,w=5):
+    return ext_mul_wnaf(P,wnaf(k,w),w)
+
+# Variable-base scalar multiplication by an integer already recoded with `wnaf`
+def ext_mul_wnaf(P,digits,w=5):
+    if len(digits) == 0:
+        return (0,1,1,0)
+    pos, neg = ext_odd_multiples(P,w)
+    R = pos[digits[-1] >> 1] # the leading digit is always positive
+    for i in range(len(digits)-2,-1,-1):
+        R = ext_double(R)
+        digit = digits[i]
+        if digit > 0:
+            R = ext_add(R,pos[digit >> 1])
+        elif digit < 0:
+            R = ext_add(R,neg[(-digit) >> 1])
+    return R
+
+# `ext_mul`, reported to the active Profile (if any) as a `point_mul` event
+def ext_mul_counted(P,k):
+    if profiler is not None:
+        return profiler.call('point_mul',ext_mul,P,k)
+    return ext_mul(P,k)
+
+# Curve constants, precomputed so that importing costs no exponentiations
+d = 37095705934669439343138083508754565189542113879843219016388785533085940283555 # -121665/121666
+d2 = 16295367250680780974490674513165176452449235426866156013048779062215315747161 # 2*d
+I = 19681161376707505956807079304988542015446066515923890162744021073123829784752 # 2**((q-1)/4), a square root of -1
+
+# Curve25519 (Montgomery form) parameters for the Elligator 2 map
+montgomery_A = 486662
+sqrt_m486664 = 6853475219497561581579357271197624642482790079785650197046958215289687604742 # sqrt(-486664)
 
 # An element of the main subgroup scalar field
 class Scalar:
+    __slots__ = ('x',)
+
     def __init__(self,x):
         # Generated from an integer value
         if isinstance(x,int):
@@ -49,7 +223,9 @@ class Scalar:
                     self.x = l # technically not in scalar field; used for main subgroup membership
                 else:
                     x = bytes.fromhex(x)
-                    self.x = sum(2**i * bit(x,i) for i in range(0,b)) % l
+                    if len(x) < b//8:
+                        raise TypeError
+                    self.x = int.from_bytes(x[:b//8],'little') % l
             except:
                 raise TypeError
         else:
@@ -64,6 +240,17 @@ class Scalar:
                 raise ZeroDivisionError
         return Scalar(invert(self.x,l))
 
+    # Generated from a 32-byte little-endian encoding
+    @classmethod
+    def from_bytes(cls,data):
+        if len(data) != b//8:
+            raise TypeError
+        return cls(int.from_bytes(data,'little'))
+
+    # 32-byte little-endian encoding
+    def to_bytes(self):
+        return self.x.to_bytes(b//8,'little')
+
     # Addition
     def __add__(self,y):
         if isinstance(y,Scalar):
@@ -141,8 +328,7 @@ class Scalar:
 
     # Hex representation
     def __repr__(self):
-        bits = [(self.x >> i) & 1 for i in range(b)]
-        return bytes.hex(bytes([sum([bits[i*8+j] << j for j in range(8)]) for i in range(b//8)]))
+        return self.to_bytes().hex()
 
     # Return underlying integer
     def __int__(self):
@@ -161,12 +347,18 @@ class Scalar:
         return Scalar(-self.x)
 
 # An element of the curve group
+#
+# Internally a Point is kept in extended coordinates (see `ext_add`); the
+# affine `x` and `y` are only computed when they are actually needed
 class Point:
+    __slots__ = ('ext','table','enc')
+
     def __init__(self,x,y=None):
         # Generated from integer values
         if isinstance(x,int) and isinstance(y,int) and y is not None:
-            self.x = x
-            self.y = y
+            self.ext = (x,y,1,x*y % q)
+            self.table = None
+            self.enc = None
 
             if not self.on_curve():
                 raise ValueError
@@ -174,65 +366,112 @@ class Point:
         elif isinstance(x,str) and y is None:
             try:
                 x = bytes.fromhex(x)
-                self.y = sum(2**i * bit(x,i) for i in range(0,b-1))
-                self.x = xfromy(self.y)
-                if self.x & 1 != bit(x,b-1):
-                    self.x = q - self.x
+                if len(x) < b//8:
+                    raise TypeError
             except:
                 raise TypeError
-
-            if not self.on_curve():
-                raise ValueError
+            x = x[:b//8]
+            self.ext = decode_point(x)
+            self.table = None
+            self.enc = x
         else:
             raise TypeError
 
+    # Generated from extended coordinates
+    #
+    # This is trusted: there is no curve check, so only use it for the results
+    # of curve arithmetic on valid Points, never for untrusted input
+    @classmethod
+    def from_extended(cls,P):
+        R = cls.__new__(cls)
+        R.ext = P
+        R.table = None
+        R.enc = None
+        return R
+
+    # Generated from a 32-byte encoding
+    @classmethod
+    def from_bytes(cls,data):
+        if len(data) != b//8:
+            raise TypeError
+        data = bytes(data)
+        R = cls.from_extended(decode_point(data))
+        R.enc = data
+        return R
+
+    # 32-byte encoding: little-endian y, with the parity of x in the top bit
+    # The encoding is kept on the instance after the first call
+    def to_bytes(self):
+        if self.enc is not None:
+            if point_cache is not None:
+                point_cache.encode_hits += 1
+            return self.enc
+        if point_cache is not None:
+            point_cache.encode_misses += 1
+        X,Y,_,_ = self.normalize().ext
+        self.enc = (Y | ((X & 1) << (b-1))).to_bytes(b//8,'little')
+        return self.enc
+
+    # Convert to affine coordinates in place (Z = 1)
+    def normalize(self):
+        X,Y,Z,T = self.ext
+        if Z != 1:
+            z = invert(Z,q)
+            X = X*z % q
+            Y = Y*z % q
+            self.ext = (X,Y,1,X*Y % q)
+        return self
+
+    # Affine coordinates
+    @property
+    def x(self):
+        return self.normalize().ext[0]
+
+    @property
+    def y(self):
+        return self.normalize().ext[1]
+
     # Equality
     def __eq__(self,Q):
         if isinstance(Q,Point):
-            return self.x == Q.x and self.y == Q.y
+            X1,Y1,Z1,_ = self.ext
+            X2,Y2,Z2,_ = Q.ext
+            return (X1*Z2 - X2*Z1) % q == 0 and (Y1*Z2 - Y2*Z1) % q == 0
         raise TypeError
 
     # Inequality
     def __ne__(self,Q):
         if isinstance(Q,Point):
-            return self.x != Q.x or self.y != Q.y
+            return not self == Q
         raise TypeError
     
     # Addition
     def __add__(self,Q):
         if isinstance(Q,Point):
-            x1 = self.x
-            y1 = self.y
-            x2 = Q.x
-            y2 = Q.y
-            x3 = (x1*y2+x2*y1) * invert(1+d*x1*x2*y1*y2,q)
-            y3 = (y1*y2+x1*x2) * invert(1-d*x1*x2*y1*y2,q)
-            return Point(x3 % q, y3 % q)
+            if profiler is not None:
+                return Point.from_extended(profiler.call('point_add',ext_add,self.ext,Q.ext))
+            return Point.from_extended(ext_add(self.ext,Q.ext))
         return NotImplemented
 
     # Subtraction
     def __sub__(self,Q):
         if isinstance(Q,Point):
-            x1 = self.x
-            y1 = self.y
-            x2 = -Q.x
-            y2 = Q.y
-            x3 = (x1*y2+x2*y1) * invert(1+d*x1*x2*y1*y2,q)
-            y3 = (y1*y2+x1*x2) * invert(1-d*x1*x2*y1*y2,q)
-            return Point(x3 % q, y3 % q)
+            if profiler is not None:
+                return Point.from_extended(profiler.call('point_sub',ext_add,self.ext,ext_neg(Q.ext)))
+            return Point.from_extended(ext_add(self.ext,ext_neg(Q.ext)))
         return NotImplemented
 
     # Multiplication
     def __mul__(self,y):
         # Point-Scalar: scalar multiplication
         if isinstance(y,Scalar):
-            if y == Scalar(0):
-                return Point(0,1)
-            Q = self.__mul__(y/Scalar(2))
-            Q = Q.__add__(Q)
-            if y.x & 1:
-                Q = self.__add__(Q)
-            return Q
+            if profiler is not None:
+                if self.table is not None:
+                    return Point.from_extended(profiler.call('point_mul_base',self.table.mul,y.x))
+                return Point.from_extended(profiler.call('point_mul',ext_mul,self.ext,y.x))
+            if self.table is not None:
+                return Point.from_extended(self.table.mul(y.x))
+            return Point.from_extended(ext_mul(self.ext,y.x))
         return NotImplemented
 
     def __rmul__(self,y):
@@ -243,18 +482,331 @@ class Point:
 
     # Hex representation
     def __repr__(self):
-        bits = [(self.y >> i) & 1 for i in range(b-1)] + [self.x & 1]
-        return bytes.hex(bytes([sum([bits[i*8+j] << j for j in range(8)]) for i in range(b//8)]))
+        return self.to_bytes().hex()
 
     # Curve membership (not main subgroup!)
     def on_curve(self):
-        x = self.x
-        y = self.y
-        return (-x*x + y*y - 1 - d*x*x*y*y) % q == 0
+        X,Y,Z,T = self.ext
+        return (-X*X + Y*Y - Z*Z - d*T*T) % q == 0 and (X*Y - Z*T) % q == 0
+
+    # Main subgroup membership, by checking that l*P is the identity
+    # To check many Points at once, use `subgroup_failures`
+    def in_subgroup(self):
+        return ext_is_identity(ext_mul_counted(self.ext,l))
 
     # Negation
     def __neg__(self):
-        return Z - self
+        return Point.from_extended(ext_neg(self.ext))
+
+# Decompress a 32-byte Point encoding to extended coordinates
+#
+# This recovers x from y with a single exponentiation (`sqrt_ratio`) and
+# raises ValueError if the encoding is not on the curve
+def decompress(data):
+    y = int.from_bytes(data,'little')
+    sign = y >> (b-1)
+    y &= (1 << (b-1)) - 1
+    yy = y*y
+    square, x = sqrt_ratio(yy-1,d*yy+1)
+    if not square:
+        raise ValueError
+    if x & 1:
+        x = q-x
+    if x & 1 != sign:
+        x = q-x
+    return (x,y,1,x*y % q)
+
+# A bounded least-recently-used cache of decoded Points, keyed by encoding
+class PointCache:
+    def __init__(self,size):
+        if not isinstance(size,int) or size <= 0:
+            raise ValueError
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.encode_hits = 0
+        self.encode_misses = 0
+
+    # Look up the extended coordinates for an encoding, or None
+    def get(self,key):
+        ext = self.entries.get(key)
+        if ext is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return ext
+
+    # Store the extended coordinates for an encoding, evicting the oldest entry if full
+    def put(self,key,ext):
+        self.entries[key] = ext
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    # Drop all entries and counters
+    def clear(self):
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+        self.encode_hits = self.encode_misses = 0
+
+    # Hit and miss statistics
+    def stats(self):
+        return {
+            'size': self.size,
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'encode_hits': self.encode_hits,
+            'encode_misses': self.encode_misses,
+        }
+
+# The active decoding cache, if any; see `enable_point_cache`
+point_cache = None
+
+# Cache decoded Points (opt-in); returns the new cache
+#
+# Encodings seen again skip decompression entirely, and Point-to-encoding
+# hits (the encoding kept on each instance) are counted in the same stats
+def enable_point_cache(size=4096):
+    global point_cache
+    point_cache = PointCache(size)
+    return point_cache
+
+# Stop caching decoded Points
+def disable_point_cache():
+    global point_cache
+    point_cache = None
+
+# Decode a 32-byte Point encoding to extended coordinates, using the cache if enabled
+def decode_point(data):
+    if point_cache is None:
+        return decompress(data)
+    ext = point_cache.get(data)
+    if ext is None:
+        ext = decompress(data)
+        point_cache.put(data,ext)
+    return ext
+
+# Convert many Points to affine coordinates in place, with a single field inversion
+def normalize_points(points):
+    pending = [P for P in points if P.ext[2] != 1]
+    for P,ext in zip(pending,ext_normalize_many([P.ext for P in pending])):
+        P.ext = ext
+    return points
+
+# The optional NumPy batch engine (module limbs25519), if enabled
+vector_engine = None
+vector_threshold = 1024
+
+# Use the NumPy limb engine for componentwise PointVector operations (opt-in)
+#
+# Additions, subtractions and scalar multiplications on PointVectors of at least
+# `threshold` Points then run across all elements at once. Results are the same
+# Points as on the default path. This raises ImportError if NumPy is missing.
+def enable_vector_engine(threshold=1024):
+    global vector_engine, vector_threshold
+    import limbs25519
+    vector_engine = limbs25519
+    vector_threshold = threshold
+
+# Go back to the default path for PointVector operations
+def disable_vector_engine():
+    global vector_engine
+    vector_engine = None
+
+# Whether a PointVector operation of this size should use the NumPy engine
+def use_vector_engine(n):
+    return vector_engine is not None and n >= vector_threshold
+
+# The optional process pool for large operations, if enabled
+parallel_pool = None
+parallel_workers = 1
+parallel_threshold = 4096
+parallel_chunk = 1024
+
+# Spread large multiexps and componentwise PointVector operations across processes (opt-in)
+#
+# Operations on at least `threshold` elements are split into at most one shard
+# per worker, each of at least `chunk` elements, so that pickling does not
+# dominate; smaller operations stay inline.
+def enable_parallel(workers=None,threshold=4096,chunk=1024):
+    global parallel_pool, parallel_workers, parallel_threshold, parallel_chunk
+    disable_parallel()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    parallel_pool = ProcessPoolExecutor(max_workers=workers)
+    parallel_workers = workers
+    parallel_threshold = threshold
+    parallel_chunk = chunk
+
+# Shut down the process pool, if any
+def disable_parallel():
+    global parallel_pool
+    if parallel_pool is not None:
+        parallel_pool.shutdown()
+    parallel_pool = None
+
+# Split index range(n) into shards for the process pool, or None to stay inline
+def parallel_shards(n):
+    if parallel_pool is None or n < parallel_threshold:
+        return None
+    count = max(1,min(parallel_workers,n//parallel_chunk))
+    if count == 1:
+        return None
+    size = -(-n//count)
+    return [(i,min(i+size,n)) for i in range(0,n,size)]
+
+# Worker entry points, on extended coordinates so that only integers are pickled
+# (multiexp shards run `ext_multiexp` directly)
+def parallel_mul_shard(Ps,ks):
+    return [ext_mul(P,k) for P,k in zip(Ps,ks)]
+
+def parallel_mul_scalar_shard(Ps,k):
+    digits = wnaf(k,5)
+    return [ext_mul_wnaf(P,digits) for P in Ps]
+
+# Run a componentwise worker over shards and collect the Points in order
+def parallel_map(shards,function,Ps,ks):
+    futures = []
+    for start,stop in shards:
+        shard_ks = ks[start:stop] if isinstance(ks,list) else ks
+        futures.append(parallel_pool.submit(function,Ps[start:stop],shard_ks))
+    return PointVector([Point.from_extended(P) for future in futures for P in future.result()])
+
+# Operation counts and timings for a scope (opt-in); see `profile`
+#
+# Each event name gets a number of calls, their total time in seconds and a total
+# size (the number of inputs for batch operations, attempts for hashing). Times
+# include nested events, so a multiexp's time also covers any inversions it does.
+class Profile:
+    def __init__(self,trace=False):
+        self.trace = trace
+        self.calls = {}
+        self.seconds = {}
+        self.sizes = {}
+        self.events = []
+        self.parent = None
+        self.origin = time.perf_counter()
+
+    def __enter__(self):
+        global profiler
+        self.parent = profiler
+        profiler = self
+        return self
+
+    def __exit__(self,*args):
+        global profiler
+        profiler = self.parent
+        self.parent = None
+        return False
+
+    # Record an event that started at `start` (from `time.perf_counter`) and ends now
+    #
+    # Enclosing scopes see the event too
+    def record(self,name,start,size=1):
+        stop = time.perf_counter()
+        scope = self
+        while scope is not None:
+            scope.calls[name] = scope.calls.get(name,0) + 1
+            scope.seconds[name] = scope.seconds.get(name,0.0) + (stop - start)
+            scope.sizes[name] = scope.sizes.get(name,0) + size
+            if scope.trace:
+                scope.events.append((name,start,stop,size))
+            scope = scope.parent
+
+    # Record an untimed event
+    def count(self,name,size=1):
+        now = time.perf_counter()
+        scope = self
+        while scope is not None:
+            scope.calls[name] = scope.calls.get(name,0) + 1
+            scope.seconds.setdefault(name,0.0)
+            scope.sizes[name] = scope.sizes.get(name,0) + size
+            if scope.trace:
+                scope.events.append((name,now,now,size))
+            scope = scope.parent
+
+    # Time a call to `function`
+    def call(self,name,function,*args,size=1):
+        start = time.perf_counter()
+        result = function(*args)
+        self.record(name,start,size)
+        return result
+
+    # Time a block of your own code as a named event: `with prof.span('verify'): ...`
+    def span(self,name,size=1):
+        return ProfileSpan(self,name,size)
+
+    # Calls, total seconds and total size for each event name
+    def stats(self):
+        return {name: {
+            'calls': self.calls[name],
+            'seconds': self.seconds[name],
+            'size': self.sizes[name],
+        } for name in self.calls}
+
+    # Recorded events in Chrome trace format (needs `trace=True`), for chrome://tracing or Perfetto
+    def chrome_trace(self):
+        pid = os.getpid()
+        events = [{
+            'name': name,
+            'ph': 'X',
+            'ts': (start - self.origin)*1e6,
+            'dur': (stop - start)*1e6,
+            'pid': pid,
+            'tid': 0,
+            'args': {'size': size},
+        } for name,start,stop,size in self.events]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self,path):
+        with open(path,'w') as f:
+            json.dump(self.chrome_trace(),f)
+
+    # Drop all counts and events
+    def clear(self):
+        self.calls.clear()
+        self.seconds.clear()
+        self.sizes.clear()
+        self.events.clear()
+        self.origin = time.perf_counter()
+
+class ProfileSpan:
+    def __init__(self,profile,name,size):
+        self.profile = profile
+        self.name = name
+        self.size = size
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self,*args):
+        self.profile.record(self.name,self.start,self.size)
+        return False
+
+# Count and time primitives within a `with` block:
+#
+#   with dumb25519.profile(trace=True) as prof:
+#       ...
+#   print(prof.stats())
+#   prof.write_chrome_trace('trace.json')
+#
+# Events are inversions (`invert`, and `invert_many` with its batch size),
+# `point_add`, `point_sub`, scalar multiplications (`point_mul`, and
+# `point_mul_base` for registered bases; PointVector products report one
+# `point_mul` per batch with its size), `double_mul`, `multiexp` with its
+# size, and `hash_to_point`/`hash_to_point_fast`/`hash_to_points` with the
+# number of attempts or points. Nested scopes also report to the enclosing
+# ones. Work done in the process pool is only seen as the enclosing call.
+def profile(trace=False):
+    return Profile(trace)
 
 # A vector of Points with superpowers
 class PointVector:
@@ -281,23 +833,64 @@ class PointVector:
     # Addition
     def __add__(self,W):
         if isinstance(W,PointVector) and len(self.points) == len(W.points):
+            if use_vector_engine(len(self.points)):
+                exts = vector_engine.add_many([P.ext for P in self.points],[P.ext for P in W.points])
+                return PointVector([Point.from_extended(P) for P in exts])
             return PointVector([self.points[i] + W.points[i] for i in range(len(self.points))])
         return NotImplemented
 
     # Subtraction
     def __sub__(self,W):
         if isinstance(W,PointVector) and len(self.points) == len(W.points):
+            if use_vector_engine(len(self.points)):
+                exts = vector_engine.sub_many([P.ext for P in self.points],[P.ext for P in W.points])
+                return PointVector([Point.from_extended(P) for P in exts])
             return PointVector([self.points[i] - W.points[i] for i in range(len(self.points))])
         return NotImplemented
 
     # Multiplication
     def __mul__(self,s):
-        # PointVector-Scalar: componentwise Point-Scalar multiplication
+        # One `point_mul` event for the whole batch, with its size
+        if profiler is not None and isinstance(s,(Scalar,ScalarVector)):
+            start = time.perf_counter()
+            result = self.multiply(s)
+            if result is not NotImplemented:
+                profiler.record('point_mul',start,len(self.points))
+            return result
+        return self.multiply(s)
+
+    def multiply(self,s):
+        # PointVector-Scalar: componentwise Point-Scalar multiplication, recoding the Scalar once
         if isinstance(s,Scalar):
-            return PointVector([self.points[i]*s for i in range(len(self.points))])
+            shards = parallel_shards(len(self.points))
+            if shards is not None:
+                return parallel_map(shards,parallel_mul_scalar_shard,[P.ext for P in self.points],s.x)
+            if use_vector_engine(len(self.points)):
+                exts = vector_engine.mul_scalar_many([P.ext for P in self.points],s.x)
+                return PointVector([Point.from_extended(P) for P in exts])
+            digits = wnaf(s.x,5)
+            result = []
+            for P in self.points:
+                if P.table is not None:
+                    result.append(Point.from_extended(P.table.mul(s.x)))
+                else:
+                    result.append(Point.from_extended(ext_mul_wnaf(P.ext,digits)))
+            return PointVector(result)
         # PointVector-ScalarVector: Hadamard product
-        if isinstance(s,ScalarVector) and len(self.points) == len(s.scalars):
-            return PointVector([s[i]*self[i] for i in range(len(self))])
+        if isinstance(s,ScalarVector) and len(self.points) == len(s):
+            shards = parallel_shards(len(self.points))
+            if shards is not None:
+                return parallel_map(shards,parallel_mul_shard,[P.ext for P in self.points],s.ints())
+            if use_vector_engine(len(self.points)):
+                exts = vector_engine.mul_many([P.ext for P in self.points],s.ints())
+                return PointVector([Point.from_extended(P) for P in exts])
+            result = []
+            for P,k in zip(self.points,s.ints()):
+                if P.table is not None:
+                    result.append(Point.from_extended(P.table.mul(k)))
+                else:
+                    result.append(Point.from_extended(ext_mul(P.ext,k)))
+            return PointVector(result)
         return NotImplemented
 
     def __rmul__(self,s):
@@ -311,7 +904,7 @@ class PointVector:
 
     # Multiscalar multiplication
     def __pow__(self,s):
-        if isinstance(s,ScalarVector) and len(self.points) == len(s.scalars):
+        if isinstance(s,ScalarVector) and len(self.points) == len(s):
             return multiexp(s,self)
         return NotImplemented
 
@@ -347,10 +940,30 @@ class PointVector:
         else:
             raise TypeError
 
+    # Convert all underlying Points to affine coordinates with a single inversion
+    def normalize(self):
+        normalize_points(self.points)
+        return self
+
     # Hex representation of underlying Points
     def __repr__(self):
+        self.normalize()
         return repr(self.points)
 
+    # Concatenated 32-byte encodings of underlying Points
+    def to_bytes(self):
+        self.normalize()
+        return b''.join(P.to_bytes() for P in self.points)
+
+    # Generated from concatenated 32-byte encodings
+    @classmethod
+    def from_bytes(cls,data):
+        size = b//8
+        if len(data) % size != 0:
+            raise TypeError
+        view = memoryview(data)
+        return cls([Point.from_bytes(view[i:i+size]) for i in range(0,len(data),size)])
+
     # Negation
     def __neg__(self):
         return PointVector([-P for P in self.points])
@@ -461,6 +1074,22 @@ class ScalarVector:
     def __repr__(self):
         return repr(self.scalars)
 
+    # Concatenated 32-byte encodings of underlying Scalars
+    def to_bytes(self):
+        return b''.join(s.x.to_bytes(b//8,'little') for s in self.scalars)
+
+    # Underlying integers
+    def ints(self):
+        return [s.x for s in self.scalars]
+
+    # Generated from concatenated 32-byte encodings
+    @classmethod
+    def from_bytes(cls,data):
+        size = b//8
+        if len(data) % size != 0:
+            raise TypeError
+        return cls([Scalar(int.from_bytes(data[i:i+size],'little')) for i in range(0,len(data),size)])
+
     # Componentwise inversion (possibly with zero)
     def invert(self,allow_zero=False):
         # If we allow zero, the efficient method doesn't work
@@ -490,6 +1119,181 @@ class ScalarVector:
     def __neg__(self):
         return ScalarVector([-s for s in self.scalars])
 
+# A ScalarVector stored as a plain list of reduced integers
+#
+# No Scalar objects are kept, which saves about a third of the memory of a
+# ScalarVector, and arithmetic works on the integers directly: inner products and
+# sums reduce once at the end. Elements come back as Scalars on indexing, and
+# `scalars` builds the whole list of Scalars on demand for code that expects a
+# plain ScalarVector.
+class CompactScalarVector(ScalarVector):
+    def __init__(self,scalars=None):
+        if scalars is None:
+            scalars = []
+        if isinstance(scalars,ScalarVector):
+            self.values = list(scalars.ints())
+            return
+        self.values = []
+        for scalar in scalars:
+            if isinstance(scalar,Scalar):
+                self.values.append(scalar.x)
+            elif isinstance(scalar,int):
+                self.values.append(scalar % l)
+            else:
+                raise TypeError
+
+    # Generated from integers that are already reduced (the list is not copied)
+    @classmethod
+    def from_ints(cls,ints):
+        result = cls.__new__(cls)
+        result.values = ints
+        return result
+
+    # Generated from concatenated 32-byte encodings
+    @classmethod
+    def from_bytes(cls,data):
+        size = b//8
+        if len(data) % size != 0:
+            raise TypeError
+        view = memoryview(data)
+        return cls.from_ints([int.from_bytes(view[i:i+size],'little') % l for i in range(0,len(data),size)])
+
+    # Concatenated 32-byte encodings of underlying Scalars
+    def to_bytes(self):
+        return b''.join(x.to_bytes(b//8,'little') for x in self.values)
+
+    # Underlying integers
+    def ints(self):
+        return self.values
+
+    # All elements as Scalars
+    @property
+    def scalars(self):
+        return [Scalar(x) for x in self.values]
+
+    # Convert to a plain ScalarVector
+    def to_scalar_vector(self):
+        return ScalarVector(self.scalars)
+
+    # Equality
+    def __eq__(self,s):
+        if isinstance(s,ScalarVector):
+            return self.values == s.ints()
+        raise TypeError
+
+    # Inequality
+    def __ne__(self,s):
+        if isinstance(s,ScalarVector):
+            return self.values != s.ints()
+        raise TypeError
+
+    # Addition
+    def __add__(self,s):
+        if isinstance(s,ScalarVector) and len(self) == len(s):
+            return CompactScalarVector.from_ints([(x+y) % l for x,y in zip(self.values,s.ints())])
+        return NotImplemented
+
+    def __radd__(self,s):
+        return self + s
+
+    # Subtraction
+    def __sub__(self,s):
+        if isinstance(s,ScalarVector) and len(self) == len(s):
+            return CompactScalarVector.from_ints([(x-y) % l for x,y in zip(self.values,s.ints())])
+        return NotImplemented
+
+    def __rsub__(self,s):
+        if isinstance(s,ScalarVector) and len(self) == len(s):
+            return CompactScalarVector.from_ints([(y-x) % l for x,y in zip(self.values,s.ints())])
+        return NotImplemented
+
+    # Multiplication
+    def __mul__(self,s):
+        # CompactScalarVector-Scalar: componentwise Scalar-Scalar multiplication
+        if isinstance(s,Scalar):
+            return CompactScalarVector.from_ints([x*s.x % l for x in self.values])
+        # CompactScalarVector-ScalarVector: Hadamard product
+        if isinstance(s,ScalarVector) and len(self) == len(s):
+            return CompactScalarVector.from_ints([x*y % l for x,y in zip(self.values,s.ints())])
+        return NotImplemented
+
+    def __rmul__(self,s):
+        if isinstance(s,(Scalar,ScalarVector)):
+            return self*s
+        return NotImplemented
+
+    # Sum of all Scalars, reduced once
+    def sum(self):
+        return Scalar(sum(self.values))
+
+    # Inner product and multiscalar multiplication
+    def __pow__(self,s):
+        # CompactScalarVector**ScalarVector: inner product, reduced once
+        if isinstance(s,ScalarVector) and len(self) == len(s):
+            return Scalar(sum(x*y for x,y in zip(self.values,s.ints())))
+        # CompactScalarVector**PointVector: multiscalar multiplication
+        if isinstance(s,PointVector):
+            return s**self
+        return NotImplemented
+
+    def __rpow__(self,s):
+        if isinstance(s,ScalarVector):
+            return self**s
+        return NotImplemented
+
+    # Length
+    def __len__(self):
+        return len(self.values)
+
+    # Get slice
+    def __getitem__(self,i):
+        if not isinstance(i,slice):
+            return Scalar(self.values[i])
+        return CompactScalarVector.from_ints(self.values[i])
+
+    # Set at index
+    def __setitem__(self,i,s):
+        if isinstance(s,Scalar):
+            self.values[i] = s.x
+        else:
+            raise TypeError
+
+    # Append
+    def append(self,item):
+        if isinstance(item,Scalar):
+            self.values.append(item.x)
+        else:
+            raise TypeError
+
+    # Extend
+    def extend(self,items):
+        if isinstance(items,ScalarVector):
+            self.values.extend(items.ints())
+        else:
+            raise TypeError
+
+    # Hex representation of underlying Scalars
+    def __repr__(self):
+        return '[' + ', '.join(x.to_bytes(b//8,'little').hex() for x in self.values) + ']'
+
+    # Componentwise inversion (possibly with zero)
+    def invert(self,allow_zero=False):
+        if allow_zero:
+            nonzero = [i for i in range(len(self.values)) if self.values[i] != 0]
+        else:
+            if 0 in self.values:
+                raise ZeroDivisionError
+            nonzero = range(len(self.values))
+        inverses = invert_many([self.values[i] for i in nonzero],l)
+        result = [0]*len(self.values)
+        for i,inverse in zip(nonzero,inverses):
+            result[i] = inverse
+        return CompactScalarVector.from_ints(result)
+
+    # Negation
+    def __neg__(self):
+        return CompactScalarVector.from_ints([-x % l for x in self.values])
+
 # Try to make a point from a given y-coordinate
 def make_point(y):
     if not y < q: # stay in the field
@@ -501,7 +1305,15 @@ def make_point(y):
         return None
     return P
 
+# Clear the cofactor (8) of a point in extended coordinates with three doublings
+def ext_clear_cofactor(P):
+    return ext_double(ext_double(ext_double(P)))
+
 # Hash data to get a Point in the main subgroup
+#
+# This is the original try-and-increment construction, kept for compatibility
+# since its outputs are used as generators; see `hash_to_point_fast` for a
+# constant-cost alternative
 def hash_to_point(*data):
     result = ''
     for datum in data:
@@ -510,10 +1322,112 @@ def hash_to_point(*data):
         result += blake2s(str(datum).encode('utf-8')).hexdigest()
 
     # Continue hashing until we get a valid Point
+    start = time.perf_counter() if profiler is not None else None
+    attempts = 0
     while True:
+        attempts += 1
         result = blake2s(result.encode('utf-8')).hexdigest()
-        if make_point(int(result,16)) is not None:
-            return make_point(int(result,16))*Scalar(cofactor)
+        y = int(result,16)
+        if y < q:
+            square, x = sqrt_ratio(y*y-1,d*y*y+1)
+            if square:
+                if x & 1:
+                    x = q-x
+                if start is not None:
+                    profiler.record('hash_to_point',start,attempts)
+                return Point.from_extended(ext_clear_cofactor((x,y,1,x*y % q)))
+
+# Elligator 2 map from a field element to a point in extended coordinates (not cofactor-cleared)
+#
+# This maps to the Montgomery curve v^2 = u^3 + A*u^2 + u (Curve25519) and then to
+# edwards25519 with x = sqrt(-(A+2))*u/v and y = (u-1)/(u+1). Everything is kept
+# projective, so the cost is one exponentiation and no inversions.
+#
+# The sign of v is chosen the opposite way from the sgn0 rule of RFC 9380, so
+# outputs have the same y as the RFC's map but may have the opposite x; this
+# map is not interoperable with RFC 9380 hash-to-curve implementations.
+def ext_elligator(r):
+    D = (1 + 2*r*r) % q # never zero, since -1/2 is not a square
+    # candidate u = -A/D; its curve equation value is g/D^3
+    g = -montgomery_A*(montgomery_A*montgomery_A - montgomery_A*montgomery_A*D + D*D) % q
+    D3 = D*D*D % q
+    D9 = D3*D3*D3 % q
+    v = g*D9 * exponent(g*D9*D9*D3 % q,(q-5)//8,q) % q # as in `sqrt_ratio`, v^2*D^3 is one of g, -g, I*g, -I*g
+    check = v*v*D3 % q
+    if check == g:
+        square = True
+    elif check == q-g:
+        square = True
+        v = v*I % q
+    else:
+        # the other candidate u = -A - u has curve equation value 2*r^2*g/D^3
+        square = False
+        v = v*r*(1 + I if check == (-I*g) % q else 1 - I) % q
+    if square:
+        un = -montgomery_A % q
+    else:
+        un = -2*montgomery_A*r*r % q
+    if (v & 1) == square:
+        v = q-v
+
+    # Montgomery (un/D, v) to Edwards, in extended coordinates
+    X = sqrt_m486664*un*(un+D) % q
+    Y = (un-D)*D*v % q
+    Z = D*v*(un+D) % q
+    T = sqrt_m486664*un*(un-D) % q
+    if Z == 0: # exceptional points (2-torsion) map to the identity
+        return (0,1,1,0)
+    return (X,Y,Z,T)
+
+# Hash data to a field element, for `hash_to_point_fast`
+#
+# This is a length-prefixed blake2b hash, not RFC 9380's expand_message
+def hash_to_field(*data):
+    hasher = blake2b(digest_size=64,person=b'dumb25519-h2c')
+    for datum in data:
+        if datum is None:
+            raise TypeError
+        if isinstance(datum,(bytes,bytearray)):
+            encoded = bytes(datum)
+        elif isinstance(datum,(Point,Scalar)):
+            encoded = datum.to_bytes()
+        else:
+            encoded = str(datum).encode('utf-8')
+        hasher.update(len(encoded).to_bytes(8,'little'))
+        hasher.update(encoded)
+    return int.from_bytes(hasher.digest(),'little') % q
+
+# Hash data to get a Point in the main subgroup, at a fixed cost
+#
+# Data is hashed as bytes and mapped with Elligator 2, then the cofactor is
+# cleared with three doublings. Outputs differ from `hash_to_point`. Both the
+# hash and the map's sign convention are non-standard, so outputs do not match
+# RFC 9380 (edwards25519_XMD:SHA-512_ELL2_RO_) or other libraries.
+def hash_to_point_fast(*data):
+    if profiler is not None:
+        start = time.perf_counter()
+        P = Point.from_extended(ext_clear_cofactor(ext_elligator(hash_to_field(*data))))
+        profiler.record('hash_to_point_fast',start)
+        return P
+    return Point.from_extended(ext_clear_cofactor(ext_elligator(hash_to_field(*data))))
+
+# Hash many inputs to Points in the main subgroup with `hash_to_point_fast`
+#
+# Each item is either a tuple of data or a single datum. The results are
+# returned as a PointVector already converted to affine coordinates, at the
+# cost of one inversion for the whole batch.
+def hash_to_points(items):
+    if profiler is not None:
+        start = time.perf_counter()
+    points = []
+    for item in items:
+        if not isinstance(item,tuple):
+            item = (item,)
+        points.append(Point.from_extended(ext_clear_cofactor(ext_elligator(hash_to_field(*item)))))
+    points = normalize_points(points)
+    if profiler is not None:
+        profiler.record('hash_to_points',start,len(points))
+    return PointVector(points)
 
 # Hash data to get a Scalar
 def hash_to_scalar(*data):
@@ -536,19 +1450,322 @@ def random_scalar(zero=True):
         raise ValueError('Random scalar unexpectedly returned zero!')
     return value
 
+# Generate many random Scalars at once, as a ScalarVector
+#
+# This draws all the randomness in one call; each Scalar is reduced from 512 bits,
+# so the bias is negligible
+def random_scalars(n):
+    data = secrets.token_bytes(64*n)
+    return ScalarVector([Scalar(int.from_bytes(data[64*i:64*i+64],'little')) for i in range(n)])
+
 # Generate a random Point in the main subgroup
 def random_point():
-    return hash_to_point(secrets.randbits(b))
+    return hash_to_point_fast(secrets.token_bytes(b//8))
+
+# Generators hash_to_point(label,0), ..., hash_to_point(label,n-1), in affine coordinates
+#
+# These cost a try-and-increment hash each, so if the table directory is enabled
+# (see `enable_tables`) they are computed once and then read as (x,y) pairs
+def generators(label,n):
+    if table_dir is None:
+        return PointVector(normalize_points([hash_to_point(label,i) for i in range(n)]))
+    build = lambda: b''.join(x.to_bytes(32,'little') for P in normalize_points([hash_to_point(label,i) for i in range(n)]) for x in P.ext[:2])
+    data = load_table('generators',table_key(label,n),64,build)
+    points = []
+    for i in range(TABLE_HEADER.size,len(data),64):
+        x = int.from_bytes(data[i:i+32],'little')
+        y = int.from_bytes(data[i+32:i+64],'little')
+        points.append(Point.from_extended((x,y,1,x*y % q)))
+    data.close()
+    return PointVector(points)
+
+# Persistent precomputation tables (opt-in)
+#
+# A table file is a header followed by a payload of fixed-size records:
+#   magic, format version, kind (like b'fixedbase'), a 32-byte key naming the
+#   contents, payload length and record size, and a blake2b digest of the payload
+# Files are written to a temporary name and renamed, so readers never see a
+# partial table, and are memory-mapped read-only, so processes using the same
+# file share one copy of its pages. A file with a bad header or digest is
+# rebuilt. Bump TABLE_VERSION whenever a payload layout changes.
+TABLE_MAGIC = b'DUMBTBL1'
+TABLE_VERSION = 1
+TABLE_HEADER = struct.Struct('<8sI16s32sQI32s')
+
+# The table directory, if enabled; see `enable_tables`
+table_dir = None
+
+# Keep precomputed tables in a directory (opt-in)
+#
+# Fixed-base tables registered with `persist` (like G's), generator vectors
+# from `generators`, and Elgamal discrete logarithm tables are then built on
+# first use, saved, and memory-mapped by every later user. Only discrete
+# logarithm tables stay mapped, so their pages are shared across processes;
+# fixed-base tables and generators are copied into integers when read, which
+# saves the time to build them but not memory. With no path, the directory
+# comes from the DUMB25519_TABLES environment variable, or defaults to
+# ~/.cache/dumb25519; setting the variable also enables tables at import,
+# including in worker processes.
+def enable_tables(path=None):
+    global table_dir
+    if path is None:
+        path = os.environ.get('DUMB25519_TABLES') or os.path.join(os.path.expanduser('~'),'.cache','dumb25519')
+    os.makedirs(path,exist_ok=True)
+    table_dir = path
+    return path
+
+# Stop using the table directory; tables already loaded stay in use
+def disable_tables():
+    global table_dir
+    table_dir = None
+
+# A 32-byte key naming a table's contents, from its parameters
+def table_key(*data):
+    hasher = blake2b(digest_size=32,person=b'dumb25519-table')
+    for datum in data:
+        encoded = datum if isinstance(datum,bytes) else str(datum).encode('utf-8')
+        hasher.update(len(encoded).to_bytes(8,'little'))
+        hasher.update(encoded)
+    return hasher.digest()
+
+# The file for a table in the table directory
+def table_path(kind,key):
+    if table_dir is None:
+        raise ValueError('Tables are not enabled!')
+    return os.path.join(table_dir,'%s-%s.tbl' % (kind,key.hex()[:32]))
+
+# Write a table file atomically
+def write_table(path,kind,key,record,payload):
+    if len(payload) % record != 0:
+        raise ValueError
+    header = TABLE_HEADER.pack(TABLE_MAGIC,TABLE_VERSION,kind.encode('utf-8'),key,len(payload),record,blake2b(payload,digest_size=32).digest())
+    temp = path + '.tmp' + str(os.getpid())
+    with open(temp,'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(temp,path)
+
+# Memory-map a table file read-only after checking its header and digest; None if missing or invalid
+#
+# The payload starts at offset TABLE_HEADER.size
+def read_table(path,kind,key,record):
+    try:
+        f = open(path,'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        header = f.read(TABLE_HEADER.size)
+        if len(header) != TABLE_HEADER.size:
+            return None
+        magic, version, stored_kind, stored_key, length, stored_record, digest = TABLE_HEADER.unpack(header)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or stored_kind.rstrip(b'\0') != kind.encode('utf-8'):
+            return None
+        if stored_key != key or stored_record != record or os.fstat(f.fileno()).st_size != TABLE_HEADER.size + length:
+            return None
+        data = mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    if blake2b(memoryview(data)[TABLE_HEADER.size:],digest_size=32).digest() != digest:
+        data.close()
+        return None
+    return data
+
+# Memory-map a table from the table directory, building it with `build()` first if needed
+def load_table(kind,key,record,build):
+    path = table_path(kind,key)
+    data = read_table(path,kind,key,record)
+    if data is None:
+        write_table(path,kind,key,record,build())
+        data = read_table(path,kind,key,record)
+        if data is None:
+            raise ValueError('Corrupt table file!')
+    return data
+
+# Precomputed multiples of a fixed base Point, for fast scalar multiplication
+#
+# The table holds j*16**i*P for 0 <= i < 64 and 1 <= j <= 8 in affine Niels form.
+# A scalar is recoded into 64 signed radix-16 digits in [-8,8), so a multiplication
+# is at most 64 mixed additions and no doublings. The table is built on first use;
+# with `persist`, it is read from the table directory if enabled (see `enable_tables`).
+class FixedBase:
+    rows = 64
+
+    def __init__(self,P,persist=False):
+        if not isinstance(P,Point):
+            raise TypeError
+        self.base = P.ext
+        self.persist = persist
+        self.table = None
+
+    # Build the table; this costs about 512 additions and one field inversion
+    def build(self):
+        if self.table is not None:
+            return
+        if self.persist and table_dir is not None:
+            points = self.load()
+        else:
+            points = self.compute()
+        self.table = [points[8*i:8*i+8] for i in range(self.rows)]
+
+    def compute(self):
+        points = []
+        B = self.base
+        for i in range(self.rows):
+            row = [B]
+            for j in range(7):
+                row.append(ext_add(row[-1],B))
+            points.extend(row)
+            B = ext_double(row[-1]) # 16*B
+        return [ext_to_niels(P) for P in ext_normalize_many(points)]
+
+    # Read the table from the table directory; each entry is stored as three 32-byte field elements
+    def load(self):
+        key = table_key(Point.from_extended(self.base).to_bytes(),self.rows)
+        build = lambda: b''.join(x.to_bytes(32,'little') for N in self.compute() for x in N)
+        data = load_table('fixedbase',key,96,build)
+        view = memoryview(data)[TABLE_HEADER.size:]
+        values = [int.from_bytes(view[i:i+32],'little') for i in range(0,len(view),32)]
+        view.release()
+        data.close()
+        return [tuple(values[i:i+3]) for i in range(0,len(values),3)]
+
+    # Signed radix-16 digits, or None if the integer is too large for the table
+    def digits(self,k):
+        result = []
+        carry = 0
+        for i in range(self.rows):
+            v = (k & 15) + carry
+            k >>= 4
+            carry = (v + 8) >> 4
+            result.append(v - (carry << 4))
+        if k != 0 or carry != 0:
+            return None
+        return result
+
+    # Scalar multiplication by a nonnegative integer
+    def mul(self,k):
+        digits = self.digits(k)
+        if digits is None:
+            return ext_mul(self.base,k)
+        self.build()
+        R = (0,1,1,0)
+        for row,digit in zip(self.table,digits):
+            if digit > 0:
+                R = ext_madd(R,row[digit-1])
+            elif digit < 0:
+                R = ext_msub(R,row[-digit-1])
+        return R
+
+# Use a precomputed table for all future scalar multiplications of this Point
+#
+# This is worthwhile for long-lived bases that are multiplied many times,
+# like a public key; it returns the same Point for convenience. With `persist`,
+# the table is also kept in the table directory (see `enable_tables`); use it
+# only for a fixed set of bases, since files are never removed.
+def register_base(P,persist=False):
+    if not isinstance(P,Point):
+        raise TypeError
+    if P.table is None:
+        P.table = FixedBase(P,persist)
+    return P
 
 # The main subgroup default generator
-Gy = 4*invert(5,q)
-Gx = xfromy(Gy)
-G = Point(Gx % q, Gy % q)
+Gy = 46316835694926478169428394003475163141307993866256225615783033603165251855960 # 4/5
+Gx = 15112221349535400772501151409588531511454012693041857206046113283949847762202 # xfromy(Gy)
+G = register_base(Point(Gx,Gy),persist=True)
+
+if os.environ.get('DUMB25519_TABLES'):
+    enable_tables()
 
 # Neutral group element
 Z = Point(0,1)
 
-# Perform a multiscalar multiplication using a simplified Pippenger algorithm
+# Signed radix-2**c digits of a nonnegative integer, least significant digit first
+# Every digit is in [-2**(c-1),2**(c-1)), except possibly the last which may equal 2**(c-1)
+def signed_digits(k,c,count):
+    mask = (1 << c) - 1
+    half = 1 << (c-1)
+    result = [0]*count
+    carry = 0
+    for i in range(count):
+        v = (k & mask) + carry
+        k >>= c
+        carry = 1 if v >= half and i < count-1 else 0
+        result[i] = v - (carry << c)
+    return result
+
+# Multiscalar multiplication over extended coordinates by interleaving wNAF chains (Straus)
+def ext_multiexp_straus(ks,Ps,w=5):
+    tables = []
+    chains = []
+    for k,P in zip(ks,Ps):
+        if k == 0:
+            continue
+        tables.append(ext_odd_multiples(P,w))
+        chains.append(wnaf(k,w))
+    if len(chains) == 0:
+        return (0,1,1,0)
+    R = None
+    for i in range(max(len(digits) for digits in chains)-1,-1,-1):
+        if R is not None:
+            R = ext_double(R)
+        for (pos,neg),digits in zip(tables,chains):
+            if i >= len(digits) or digits[i] == 0:
+                continue
+            digit = digits[i]
+            T = pos[digit >> 1] if digit > 0 else neg[(-digit) >> 1]
+            R = T if R is None else ext_add(R,T)
+    return R if R is not None else (0,1,1,0)
+
+# Multiscalar multiplication over extended coordinates using signed-digit buckets (Pippenger)
+def ext_multiexp_pippenger(ks,Ps,c):
+    windows = (max(ks).bit_length() + c) // c # room for the final carry
+    digits = [signed_digits(k,c,windows) for k in ks]
+    negs = [ext_neg(P) for P in Ps]
+    buckets_count = 1 << (c-1)
+
+    result = None
+    for w in range(windows-1,-1,-1):
+        if result is not None:
+            for i in range(c):
+                result = ext_double(result)
+
+        # bucket j holds the points whose digit is +-(j+1); empty buckets are None
+        buckets = [None]*buckets_count
+        for i in range(len(Ps)):
+            digit = digits[i][w]
+            if digit > 0:
+                P = Ps[i]
+            elif digit < 0:
+                P = negs[i]
+                digit = -digit
+            else:
+                continue
+            j = digit-1
+            buckets[j] = P if buckets[j] is None else ext_add(buckets[j],P)
+
+        # sum_j (j+1)*bucket[j] as a running sum of running sums
+        running = None
+        total = None
+        for j in range(buckets_count-1,-1,-1):
+            if buckets[j] is not None:
+                running = buckets[j] if running is None else ext_add(running,buckets[j])
+            if running is not None:
+                total = running if total is None else ext_add(total,running)
+        if total is not None:
+            result = total if result is None else ext_add(result,total)
+    return result if result is not None else (0,1,1,0)
+
+# Pippenger window size for a multiscalar multiplication of the given size
+# (empirically about log2(n) - 1 in this implementation)
+def multiexp_window(n):
+    return min(max(n.bit_length() - 2,2),16)
+
+# Below this size, Straus interleaving beats Pippenger buckets
+STRAUS_THRESHOLD = 64
+
+# Perform a multiscalar multiplication
+#
+# Small inputs use interleaved wNAF (Straus); larger ones use signed-digit
+# Pippenger buckets with a window chosen from the number of points
 def multiexp(scalars,points):
     if not isinstance(scalars,ScalarVector) or not isinstance(points,PointVector):
         raise TypeError
@@ -558,46 +1775,123 @@ def multiexp(scalars,points):
     if len(scalars) == 0:
         return Z
 
-    buckets = None
-    result = Z # zero point
-   
-    c = 4 # window parameter; NOTE: the optimal value actually depends on len(points) empirically
-
-    # really we want to use the max bitlength to compute groups
-    maxscalar = int(max(scalars))
-    groups = 0
-    while maxscalar >= 2**groups:
-        groups += 1
-    groups = int((groups + c - 1) / c)
-    
-    # loop is really (groups-1)..0
-    for k in range(groups-1,-1,-1):
-        if result != Z:
-            for i in range(c):
-                result += result
-        
-        buckets = [Z]*(2**c) # clear all buckets
-        
-        # partition scalars into buckets
-        for i in range(len(scalars)):
-            bucket = 0
-            for j in range(c):
-                if int(scalars[i]) & (1 << (k*c+j)): # test for bit
-                    bucket |= 1 << j
-            
-            if bucket == 0: # zero bucket is never used
-                continue
-            
-            if buckets[bucket] != Z:
-                buckets[bucket] += points[i]
+    ks = scalars.ints()
+    Ps = [P.ext for P in points.points]
+    if profiler is not None:
+        began = time.perf_counter()
+
+    # shard by points, then add up the partial sums
+    shards = parallel_shards(len(ks))
+    if shards is not None:
+        futures = [parallel_pool.submit(ext_multiexp,ks[start:stop],Ps[start:stop]) for start,stop in shards]
+        R = (0,1,1,0)
+        for future in futures:
+            R = ext_add(R,future.result())
+    else:
+        R = ext_multiexp(ks,Ps)
+
+    if profiler is not None:
+        profiler.record('multiexp',began,len(ks))
+    return Point.from_extended(R)
+
+# Multiscalar multiplication of extended points by nonnegative integers
+def ext_multiexp(ks,Ps):
+    if len(ks) < STRAUS_THRESHOLD:
+        return ext_multiexp_straus(ks,Ps)
+    if max(ks) == 0:
+        return (0,1,1,0)
+    return ext_multiexp_pippenger(ks,Ps,multiexp_window(len(ks)))
+
+# Compute a*P + b*Q for Scalars a,b and Points P,Q
+#
+# Bases with a precomputed table (like G, see `register_base`) use it; any
+# other bases share one interleaved wNAF doubling chain (Straus), so a
+# two-term check costs little more than a single scalar multiplication
+def double_mul(a,P,b,Q):
+    if not isinstance(a,Scalar) or not isinstance(b,Scalar):
+        raise TypeError
+    if not isinstance(P,Point) or not isinstance(Q,Point):
+        raise TypeError
+    if profiler is not None:
+        start = time.perf_counter()
+
+    R = (0,1,1,0)
+    ks = []
+    Ps = []
+    for k,T in ((a.x,P),(b.x,Q)):
+        if k == 0:
+            continue
+        if T.table is not None:
+            if profiler is not None:
+                R = ext_add(R,profiler.call('point_mul_base',T.table.mul,k))
             else:
-                buckets[bucket] = points[i]
-        
-        # sum the buckets
-        pail = Z
-        for i in range(len(buckets)-1,0,-1):
-            if buckets[i] != Z:
-                pail += buckets[i]
-            if pail != Z:
-                result += pail
-    return result
+                R = ext_add(R,T.table.mul(k))
+        elif k == 1:
+            R = ext_add(R,T.ext)
+        else:
+            ks.append(k)
+            Ps.append(T.ext)
+    if len(ks) == 1:
+        R = ext_add(R,ext_mul_counted(Ps[0],ks[0]))
+    elif len(ks) == 2:
+        if profiler is not None:
+            R = ext_add(R,profiler.call('point_mul',ext_multiexp_straus,ks,Ps,size=2))
+        else:
+            R = ext_add(R,ext_multiexp_straus(ks,Ps))
+
+    if profiler is not None:
+        profiler.record('double_mul',start)
+    return Point.from_extended(R)
+
+# Check that random subset sums of the given extended points are all in the main subgroup
+#
+# A point P = P' + T splits into a main subgroup part P' and a torsion part T, and
+# only the torsion parts survive multiplication by l. If any point has T != 0, a
+# random subset sum keeps a nonzero torsion part with probability at least 1/2,
+# so `rounds` independent sums miss it with probability at most 2**-rounds.
+# Points are grouped in blocks of 5 whose 31 subset sums are precomputed, so
+# each round costs about one addition per 5 points plus a single l-multiple.
+def ext_subgroup_batch(points,rounds):
+    w = 5
+    blocks = []
+    for i in range(0,len(points),w):
+        block = points[i:i+w]
+        sums = [None]*(1 << len(block))
+        for mask in range(1,len(sums)):
+            low = mask & -mask
+            rest = mask ^ low
+            P = block[low.bit_length()-1]
+            sums[mask] = P if rest == 0 else ext_add(sums[rest],P)
+        blocks.append(sums)
+
+    for _ in range(rounds):
+        S = None
+        for sums in blocks:
+            mask = secrets.randbelow(len(sums))
+            if mask != 0:
+                S = sums[mask] if S is None else ext_add(S,sums[mask])
+        if S is not None and not ext_is_identity(ext_mul_counted(S,l)):
+            return False
+    return True
+
+# Find the indices of all Points in a PointVector that are not in the main subgroup
+#
+# An empty list means every Point passed. Large inputs are checked together with
+# random subset sums (see `ext_subgroup_batch`) and bisected on failure; inputs of
+# at most `rounds` Points are checked one by one, which is cheaper at that size.
+def subgroup_failures(points,rounds=128):
+    if not isinstance(points,PointVector):
+        raise TypeError
+    exts = [P.ext for P in points.points]
+
+    failures = []
+    pending = [list(range(len(exts)))]
+    while len(pending) > 0:
+        indices = pending.pop()
+        if len(indices) <= rounds:
+            failures.extend(i for i in indices if not ext_is_identity(ext_mul_counted(exts[i],l)))
+        elif not ext_subgroup_batch([exts[i] for i in indices],rounds):
+            half = len(indices)//2
+            pending.append(indices[half:])
+            pending.append(indices[:half])
+    return sorted(failures)
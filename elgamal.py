@@ -1,8 +1,43 @@
 # Elliptic Curve Elgamal encryption
 # This is rarely used because the points are rarely encrypted (if ever).
 
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import struct
+import tempfile
+import time
+
 import dumb25519
 
+# Below this many items, batch operations do not bother with precomputed tables or workers
+BATCH_THRESHOLD = 8
+
+# Split a list into about `count` contiguous chunks
+def split_chunks(items, count):
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# Worker entry points for process pools; Points cross process boundaries as encodings
+def encrypt_chunk(N, messages):
+    key = ElgamalPublicKey(dumb25519.Point.from_bytes(N))
+    ciphers = key.encrypt_many(dumb25519.PointVector.from_bytes(messages))
+    return dumb25519.PointVector([P for C in ciphers for P in C]).to_bytes()
+
+def decrypt_chunk(x, ciphers):
+    key = ElgamalPrivateKey(dumb25519.Scalar.from_bytes(x))
+    points = dumb25519.PointVector.from_bytes(ciphers)
+    return dumb25519.PointVector(key.decrypt_many([(points[i], points[i + 1]) for i in range(0, len(points), 2)])).to_bytes()
+
+# Run a chunk function over a process pool and flatten the decoded results into a list of Points
+#
+# Each item is a tuple of Points (a message or a ciphertext), and chunks never split an item
+def run_pool(function, key, items, workers):
+    chunks = split_chunks(items, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(function, [key] * len(chunks), [dumb25519.PointVector([P for item in chunk for P in item]).to_bytes() for chunk in chunks])
+        return [P for result in results for P in dumb25519.PointVector.from_bytes(result)]
+
 class ElgamalPublicKey:
     # Set up a public key
     #
@@ -26,6 +61,47 @@ class ElgamalPublicKey:
         r = dumb25519.random_scalar()   # blinding factor
         return (r * dumb25519.G, M + r * self.N)
 
+    # Encrypt a small integer as m*G (exponential Elgamal)
+    #
+    # INPUT
+    #   m: plaintext amount (int, nonnegative)
+    # RETURNS
+    #   ciphertext ((Point, Point))
+    def encrypt_int(self, m):
+        if not isinstance(m, int) or m < 0:
+            raise TypeError('Bad message!')
+        return self.encrypt(dumb25519.Scalar(m) * dumb25519.G)
+
+    # Encrypt many messages
+    #
+    # A precomputed table for the public key is built for the duration of the
+    # call (or the key's own table is used, if it was registered with
+    # dumb25519.register_base), so both multiplications for each message are
+    # fixed-base. With `workers`, the messages are split across a process pool.
+    #
+    # INPUT
+    #   messages: plaintext messages (iterable of Points)
+    #   workers: number of worker processes (int, optional)
+    # RETURNS
+    #   ciphertexts (list of (Point, Point))
+    def encrypt_many(self, messages, workers=None):
+        messages = list(messages)
+        for M in messages:
+            if not isinstance(M, dumb25519.Point):
+                raise TypeError('Bad message!')
+        if len(messages) < BATCH_THRESHOLD:
+            return [self.encrypt(M) for M in messages]
+
+        if workers is not None and workers > 1:
+            points = run_pool(encrypt_chunk, self.N.to_bytes(), [(M,) for M in messages], workers)
+            return [(points[i], points[i + 1]) for i in range(0, len(points), 2)]
+
+        table = self.N.table if self.N.table is not None else dumb25519.FixedBase(self.N)
+        r_list = dumb25519.random_scalars(len(messages))   # blinding factors
+        ciphers = [(r * dumb25519.G, M + dumb25519.Point.from_extended(table.mul(r.x))) for r, M in zip(r_list, messages)]
+        dumb25519.normalize_points([P for C in ciphers for P in C])
+        return ciphers
+
 class ElgamalPrivateKey:
     # Set up a private key
     #
@@ -55,7 +131,183 @@ class ElgamalPrivateKey:
         if not (len(C) == 2 and isinstance(C[0], dumb25519.Point) and isinstance(C[1], dumb25519.Point)):
             raise TypeError('Bad cipher!')
 
-        return C[1] - self.x * C[0]
+        return dumb25519.double_mul(-self.x, C[0], dumb25519.Scalar(1), C[1])
+
+    # Decrypt an exponential Elgamal ciphertext to a small integer
+    #
+    # INPUT
+    #   C: ciphertext ((Point, Point))
+    #   table: discrete logarithm table covering the plaintext range (DiscreteLogTable)
+    # RETURNS
+    #   plaintext amount (int)
+    def decrypt_int(self, C, table):
+        m = table.lookup(self.decrypt(C))
+        if m is None:
+            raise ValueError('Plaintext out of range!')
+        return m
+
+    # Decrypt many ciphertexts
+    #
+    # The private key is recoded once for all the ciphertexts. With `workers`,
+    # the ciphertexts are split across a process pool.
+    #
+    # INPUT
+    #   ciphers: ciphertexts (iterable of (Point, Point))
+    #   workers: number of worker processes (int, optional)
+    # RETURNS
+    #   plaintext messages (list of Points)
+    def decrypt_many(self, ciphers, workers=None):
+        ciphers = list(ciphers)
+        for C in ciphers:
+            if not isinstance(C, tuple):
+                raise TypeError('Bad cipher!')
+            if not (len(C) == 2 and isinstance(C[0], dumb25519.Point) and isinstance(C[1], dumb25519.Point)):
+                raise TypeError('Bad cipher!')
+        if len(ciphers) < BATCH_THRESHOLD:
+            return [self.decrypt(C) for C in ciphers]
+
+        if workers is not None and workers > 1:
+            return run_pool(decrypt_chunk, self.x.to_bytes(), ciphers, workers)
+
+        shared = dumb25519.PointVector([C[0] for C in ciphers]) * self.x
+        messages = dumb25519.PointVector([C[1] for C in ciphers]) - shared
+        return messages.normalize().points
+
+# Baby-step giant-step discrete logarithm table for m*G with 0 <= m < bound
+#
+# The baby steps j*G (0 <= j < baby) are stored in a dumb25519 table file (see
+# dumb25519.write_table) as sorted 12-byte entries: the first 8 bytes of the
+# Point encoding, then j. The file is memory-mapped read-only, so processes
+# opening the same file share one copy.
+# A lookup walks at most `bound/baby` giant steps M - i*baby*G, and every
+# match on the 8-byte key is confirmed with a fixed-base multiplication.
+class DiscreteLogTable:
+    KIND = 'dlog'
+    ENTRY = struct.Struct('<8sI')
+    GIANT_BATCH = 64   # giant steps normalized together with one inversion
+
+    # Open a table file, building it first if it is missing, corrupt or covers a different range
+    #
+    # INPUT
+    #   path: table file (str, or None for the dumb25519 table directory; see dumb25519.enable_tables)
+    #   bound: exclusive upper bound on plaintexts (int)
+    #   baby: number of baby steps (int, optional; defaults to about sqrt(bound))
+    def __init__(self, path, bound, baby=None):
+        if not isinstance(bound, int) or bound <= 0:
+            raise ValueError('Bad bound!')
+        if baby is None:
+            baby = math.isqrt(bound - 1) + 1
+        if not isinstance(baby, int) or baby <= 0 or baby >= 2**32:
+            raise ValueError('Bad baby step count!')
+        key = dumb25519.table_key(self.KIND, bound, baby)
+        if path is None:
+            path = dumb25519.table_path(self.KIND, key)
+        self.path = path
+        self.bound = bound
+        self.baby = baby
+        self.map = dumb25519.read_table(path, self.KIND, key, self.ENTRY.size)
+        if self.map is None:
+            dumb25519.write_table(path, self.KIND, key, self.ENTRY.size, self.build(bound, baby))
+            self.map = dumb25519.read_table(path, self.KIND, key, self.ENTRY.size)
+        if self.map is None or len(self.map) != dumb25519.TABLE_HEADER.size + baby * self.ENTRY.size:
+            raise ValueError('Corrupt table file!')
+
+        # -baby*G, for the giant steps
+        self.giant = dumb25519.PointVector([-(dumb25519.Scalar(baby) * dumb25519.G)]).normalize()[0]
+        self.lookups = 0
+        self.lookup_time = 0.0
+
+    # Compute the sorted table entries
+    #
+    # INPUT
+    #   bound: exclusive upper bound on plaintexts (int)
+    #   baby: number of baby steps (int)
+    # RETURNS
+    #   table payload (bytes)
+    @classmethod
+    def build(cls, bound, baby):
+        entries = []
+        chunk = []
+        P = (0, 1, 1, 0)   # identity, in extended coordinates
+        G = dumb25519.G.ext
+        for j in range(baby):
+            chunk.append(P)
+            P = dumb25519.ext_add(P, G)
+            if len(chunk) == 4096 or j == baby - 1:
+                start = j + 1 - len(chunk)
+                for k, N in enumerate(dumb25519.ext_normalize_many(chunk)):
+                    entries.append((dumb25519.Point.from_extended(N).to_bytes()[:8], start + k))
+                chunk = []
+        entries.sort()
+        return b''.join(cls.ENTRY.pack(key, j) for key, j in entries)
+
+    # Baby step indices whose 8-byte key matches
+    def find(self, key):
+        size = self.ENTRY.size
+        offset = dumb25519.TABLE_HEADER.size
+        lo = 0
+        hi = self.baby
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.map[offset + mid * size:offset + mid * size + 8] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        result = []
+        while lo < self.baby:
+            entry_key, j = self.ENTRY.unpack_from(self.map, offset + lo * size)
+            if entry_key != key:
+                break
+            result.append(j)
+            lo += 1
+        return result
+
+    # Find m with m*G == M and 0 <= m < bound
+    #
+    # INPUT
+    #   M: Point
+    # RETURNS
+    #   m (int), or None if M is not in range
+    def lookup(self, M):
+        if not isinstance(M, dumb25519.Point):
+            raise TypeError('Bad point!')
+        start = time.perf_counter()
+        try:
+            return self.search(M)
+        finally:
+            self.lookups += 1
+            self.lookup_time += time.perf_counter() - start
+
+    def search(self, M):
+        giants = -(-self.bound // self.baby)
+        Q = M.ext
+        for i in range(0, giants, self.GIANT_BATCH):
+            batch = []
+            for _ in range(min(self.GIANT_BATCH, giants - i)):
+                batch.append(Q)
+                Q = dumb25519.ext_add(Q, self.giant.ext)
+            for k, P in enumerate(dumb25519.ext_normalize_many(batch)):
+                for j in self.find(dumb25519.Point.from_extended(P).to_bytes()[:8]):
+                    m = (i + k) * self.baby + j
+                    if m < self.bound and dumb25519.Scalar(m) * dumb25519.G == M:
+                        return m
+        return None
+
+    # Table size and lookup throughput
+    def stats(self):
+        return {
+            'bound': self.bound,
+            'baby_steps': self.baby,
+            'giant_steps': -(-self.bound // self.baby),
+            'file_bytes': len(self.map),
+            'lookups': self.lookups,
+            'lookup_seconds': self.lookup_time,
+            'lookups_per_second': self.lookups / self.lookup_time if self.lookup_time > 0 else None,
+        }
+
+    # Release the memory map
+    def close(self):
+        self.map.close()
 
 if __name__ == '__main__':
     # TESTING
@@ -76,3 +328,26 @@ if __name__ == '__main__':
         print("Works like a charm!")
     else:
         print("Plaintext not recovered.")
+
+    # Exponential Elgamal with a discrete logarithm table of more than 4096 baby
+    # steps, so that it is built in several chunks
+    handle, path = tempfile.mkstemp(suffix='.dlog')
+    os.close(handle)
+    table = DiscreteLogTable(path, 15000, baby=5000)
+    amounts = [0, 4095, 4096, 4097, 4999, 9100, 14999]
+    recovered = [privkey.decrypt_int(pubkey.encrypt_int(m), table) for m in amounts]
+    table.close()
+    os.remove(path)
+    if recovered == amounts:
+        print("Discrete log table works like a charm!")
+    else:
+        print("Amounts not recovered.")
+
+    # Batch encryption and decryption over a process pool, with a count that
+    # does not split evenly across the workers
+    plaintexts = [dumb25519.random_point() for _ in range(9)]
+    ciphers = pubkey.encrypt_many(plaintexts, workers=2)
+    if privkey.decrypt_many(ciphers, workers=2) == plaintexts and privkey.decrypt_many(ciphers, workers=4) == plaintexts:
+        print("Batch over workers works like a charm!")
+    else:
+        print("Batch plaintexts not recovered.")
@@ -3,6 +3,9 @@
 #
 # Unoptimized and no error-checking. Coded for clarity instead.
 
+from functools import lru_cache
+import secrets
+
 import dumb25519
 
 # polynomial evaluation poly(x)
@@ -14,6 +17,67 @@ def polynomial(x, a_list):
         powers_x.append(x * powers_x[i])
     return powers_x ** dumb25519.ScalarVector(a_list)
 
+# polynomial evaluation poly(x) on raw integers (Horner's rule)
+#    * x: int
+#    * a_ints: list of coefficients as ints
+# Reduction mod l is deferred until the accumulator grows past 512 bits, so
+# small x (the usual player numbers) costs one reduction at the end.
+def horner(x, a_ints):
+    acc = 0
+    for a in reversed(a_ints):
+        acc = acc * x + a
+        if acc >> 512:
+            acc %= dumb25519.l
+    return acc % dumb25519.l
+
+# polynomial evaluation at every x in an arithmetic progression (forward differences)
+#    * xs: range of ints
+#    * a_ints: list of coefficients as ints
+# After m Horner evaluations to seed the difference table, each further value
+# costs m additions and no multiplications.
+def evaluate_progression(xs, a_ints):
+    m = len(a_ints)
+    diffs = [horner(xs[i], a_ints) for i in range(min(m, len(xs)))]
+    for j in range(1, len(diffs)):
+        for i in range(len(diffs) - 1, j - 1, -1):
+            diffs[i] = (diffs[i] - diffs[i - 1]) % dumb25519.l
+    for _ in range(len(xs)):
+        yield diffs[0]
+        for j in range(len(diffs) - 1):
+            diffs[j] += diffs[j + 1]
+            if diffs[j] >= dumb25519.l:
+                diffs[j] -= dumb25519.l
+
+# Lagrange coefficients at 0 for a quorum of players, memoized per quorum
+#    * players: tuple of x-coords as ints (must be distinct)
+#    * returns a tuple of ints, one coefficient per player
+# ell_i = prod(x_j) / prod(x_j - x_i) over j != i. All k denominators are inverted
+# together with ScalarVector.invert, so this costs a single modular inversion.
+@lru_cache(maxsize=256)
+def lagrange_coefficients(players):
+    l = dumb25519.l
+    k = len(players)
+    # prefix and suffix products give prod(x_j), j != i, without dividing
+    prefix = [1] * (k + 1)
+    for i in range(k):
+        prefix[i + 1] = prefix[i] * players[i] % l
+    suffix = [1] * (k + 1)
+    for i in range(k - 1, -1, -1):
+        suffix[i] = suffix[i + 1] * players[i] % l
+    denominators = []
+    for i in range(k):
+        denominator = 1
+        for j in range(k):
+            if j != i:
+                denominator = denominator * (players[j] - players[i]) % l
+        denominators.append(dumb25519.Scalar(denominator))
+    inverses = dumb25519.ScalarVector(denominators).invert()
+    return tuple(prefix[i] * suffix[i + 1] * int(inverses[i]) % l for i in range(k))
+
+# whether a point vanishes once the cofactor is cleared
+def is_torsion(P):
+    return dumb25519.ext_is_identity(dumb25519.ext_clear_cofactor(P.ext))
+
 class FeldmanVSS:
     # generate share_list (for all n players) and V_list
     #    * secret: Scalar
@@ -23,48 +87,104 @@ class FeldmanVSS:
     #    * a_list: the secret polynomial
     #    * V_list: a_list * G. used in verification
     def generate(self, secret, player_list, m):
-        a_list = [None for _ in range(m)]
-        V_list = [None for _ in range(m)]
-        for i in range(m):
-            if i == 0:
-                a_list[0] = secret   # a_0 = secret
-            else:
-                a_list[i] = dumb25519.random_scalar()
-            V_list[i] = a_list[i] * dumb25519.G
-        # now generate share_list.
-        n = len(player_list)
-        share_list = [None for _ in range(n)]
-        for i in range(n):
-            share_list[i] = polynomial(player_list[i], a_list)
-        return share_list, V_list
+        V_list, shares = self.generate_iter(secret, player_list, m)
+        return list(shares), V_list
+
+    # generate V_list, and the share_list lazily, for very large committees
+    #    * secret: Scalar
+    #    * players: iterable of x-coords of share points (Scalars or ints). a range
+    #      of ints is evaluated with forward differences instead of Horner's rule.
+    #    * m: number of players needed to recover secret
+    #    * returns V_list and an iterator over share_list, which holds only the
+    #      polynomial (and the difference table) in memory
+    def generate_iter(self, secret, players, m):
+        a_list = [secret] + [dumb25519.random_scalar() for _ in range(m - 1)]
+        V_list = self.commitments(a_list)
+        a_ints = [int(a) for a in a_list]
+        if isinstance(players, range):
+            shares = (dumb25519.Scalar(y) for y in evaluate_progression(players, a_ints))
+        else:
+            shares = (dumb25519.Scalar(horner(int(x), a_ints)) for x in players)
+        return V_list, shares
+
+    # V_list = a_list * G, with G's precomputed table and a single inversion for all of them
+    #    * a_list: the secret polynomial
+    def commitments(self, a_list):
+        V_list = [a * dumb25519.G for a in a_list]
+        dumb25519.normalize_points(V_list)
+        return V_list
 
     # verify share point
     #    * player: x-coord of share point to be verified
     #    * share: y-coord of share point to be verified
     #    * V_list: <secret polynomial> * G. must have length m.
+    # The check is cofactored: share * G and sum(player^k * V_list[k]) may differ
+    # by torsion, which only a dealer who adds torsion to V_list can cause.
     def verify(self, player, share, V_list):
         LHS = share * dumb25519.G
         powers_player = dumb25519.ScalarVector()
         powers_player.append(dumb25519.Scalar(1))
         for i in range(len(V_list) - 1):
             powers_player.append(player * powers_player[i])
-        return LHS == powers_player ** dumb25519.PointVector(V_list)
+        return is_torsion(LHS - powers_player ** dumb25519.PointVector(V_list))
+
+    # verify many share points against the same V_list at once
+    #    * players: x-coords of share points to be verified
+    #    * shares: y-coords of share points to be verified
+    #    * V_list: <secret polynomial> * G. must have length m.
+    #    * returns the indices of the bad shares (an empty list if all are legit)
+    # All checks share * G == sum(player^k * V_list[k]) are folded into one with
+    # random weights r, so a single multiexp of size m+1 checks
+    # (sum r*share) * G == sum((sum r*player^k) * V_list[k]). If that fails, the
+    # shares are split in half and each half is checked again.
+    # Both this and `verify` clear the cofactor before comparing, so torsion in
+    # V_list cannot cancel out of the random combination, and the result agrees
+    # with `verify` without checking V_list for subgroup membership.
+    def verify_batch(self, players, shares, V_list):
+        if len(players) != len(shares):
+            raise IndexError
+        bad = []
+        pending = [list(range(len(players)))]
+        while len(pending) > 0:
+            indices = pending.pop()
+            if len(indices) == 0 or self.check_combined(players, shares, V_list, indices):
+                continue
+            if len(indices) == 1:
+                bad.append(indices[0])
+            else:
+                half = len(indices) // 2
+                pending.append(indices[half:])
+                pending.append(indices[:half])
+        return sorted(bad)
+
+    # one random linear combination of the share checks for the given indices
+    def check_combined(self, players, shares, V_list, indices):
+        m = len(V_list)
+        coefficients = [0] * m
+        share_sum = 0
+        for i in indices:
+            r = 1 if len(indices) == 1 else secrets.randbits(128)
+            share_sum += r * int(shares[i])
+            x = int(players[i])
+            power = r
+            for k in range(m):
+                coefficients[k] += power
+                power = power * x % dumb25519.l
+        scalars = dumb25519.ScalarVector([dumb25519.Scalar(c) for c in coefficients] + [dumb25519.Scalar(-share_sum)])
+        points = dumb25519.PointVector(list(V_list) + [dumb25519.G])
+        return is_torsion(dumb25519.multiexp(scalars, points))
 
     # recover secret
     #    * a_player_list: list of x-coords. must have at least length m.
     #    * a_share_list: list of y-coords. must have at least length m.
     def recover(self, a_player_list, a_share_list):
         # Lagrange polynomial interpolation just for a_0
-        # Faster polynomial interpolation methods can replace this
-        secret = dumb25519.Scalar(0)
-        k = len(a_player_list)
-        for i in range(k):
-            ell = dumb25519.Scalar(1)
-            for j in range(k):
-                if j != i:
-                    ell *= a_player_list[j] * (a_player_list[j] - a_player_list[i]).invert()
-            secret += a_share_list[i] * ell
-        return secret
+        # The coefficients depend only on the players, so they are cached per quorum
+        ell = lagrange_coefficients(tuple(int(x) for x in a_player_list))
+        secret = 0
+        for share, coefficient in zip(a_share_list, ell):
+            secret += int(share) * coefficient
+        return dumb25519.Scalar(secret)
 
 if __name__ == '__main__':
     # TESTING
@@ -2,6 +2,7 @@
 # Source: https://www.getmonero.org/2017/05/17/disclosure-of-a-major-bug-in-cryptonote-based-currencies.html
 
 import dumb25519
+import ristretto
 
 # Generator for the small subgroup of size of the cofactor = 8
 # Source: https://monero.stackexchange.com/a/8672
@@ -69,5 +70,18 @@ for i, j in enumerate(check_list):
 
 print('Only the #0, corresponding to the original key_image, is the TRUE key image!')
 
+# A node validating a block has many key images to check. The same check can be
+# done for all of them at once, which also finds the bad ones.
+bad_list = dumb25519.subgroup_failures(dumb25519.PointVector(ki_list))
+print(f'Key images not in the main subgroup: { bad_list }')
+
+# With Ristretto, key images are sent as Ristretto encodings, which name elements
+# of a prime-order group: decoding one costs a single square root. Adding
+# 4-torsion to a key image does not change its encoding, so key images must be
+# compared and hashed as encodings (or with ristretto.equal); the decoded Points
+# may still differ by torsion and must not be compared or hashed as plain Points.
+ri_set = set([ristretto.encode(dumb25519.Scalar(2 * i) * G_small + key_image) for i in range(4)])
+print(f'Distinct Ristretto encodings of key_image + 4-torsion: { len(ri_set) }')
+
 # See https://github.com/monero-project/monero/pull/1744/commits/d282cfcc46d39dc49e97f9ec5cedf7425e74d71f#diff-1fb58b51f281d178c1a564bccf94bc813261a1fd585a9372e3d53999a25f9a53R714
 # for the actual mitigation in Monero
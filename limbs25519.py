@@ -0,0 +1,184 @@
+# Limbs25519: batch field and point arithmetic for dumb25519 using NumPy
+#
+# Field elements are stored as 10 signed 64-bit limbs in radix 2**25.5
+# (alternating 26 and 25 bits), with one column per element, so a single
+# NumPy operation works on thousands of field elements at once. Points are
+# tuples (X,Y,Z,T) of such arrays, in the same extended coordinates as dumb25519.
+#
+# This needs NumPy; dumb25519 only imports it from `enable_vector_engine`.
+# Like dumb25519, use this code only for prototyping.
+
+import numpy as np
+
+import dumb25519
+
+q = dumb25519.q
+
+# Limb layout
+BITS = np.array([26,25]*5,dtype=np.int64).reshape(10,1)
+OFFSETS = [0,26,51,77,102,128,153,179,204,230]
+
+# Internal helper methods
+def words_from_ints(xs):
+    data = b''.join((x % q).to_bytes(32,'little') for x in xs)
+    words = np.frombuffer(data,dtype='<u8').reshape(-1,4)
+    return np.concatenate([words,np.zeros((len(xs),1),dtype=np.uint64)],axis=1)
+
+# Field elements from Python integers, as a (10,N) array
+def from_ints(xs):
+    words = words_from_ints(xs)
+    h = np.empty((10,len(xs)),dtype=np.int64)
+    for k,offset in enumerate(OFFSETS):
+        w,s = divmod(offset,64)
+        bits = int(BITS[k,0])
+        v = words[:,w] >> np.uint64(s)
+        if s + bits > 64:
+            v |= words[:,w+1] << np.uint64(64-s)
+        h[k] = (v & np.uint64((1 << bits) - 1)).astype(np.int64)
+    return h
+
+# Python integers in [0,q) from field elements
+def to_ints(h):
+    h = h.copy()
+    # exact sequential carries until every limb is in range
+    while True:
+        for k in range(10):
+            c = h[k] >> BITS[k,0]
+            h[k] -= c << BITS[k,0]
+            if k < 9:
+                h[k+1] += c
+            else:
+                h[0] += 19*c
+        if not np.any(h[0] >> BITS[0,0]):
+            break
+    words = np.zeros((h.shape[1],4),dtype=np.uint64)
+    for k,offset in enumerate(OFFSETS):
+        w,s = divmod(offset,64)
+        v = h[k].astype(np.uint64)
+        words[:,w] |= v << np.uint64(s)
+        if s + int(BITS[k,0]) > 64:
+            words[:,w+1] |= v >> np.uint64(64-s)
+    data = words.astype('<u8').tobytes()
+    return [int.from_bytes(data[32*i:32*i+32],'little') % q for i in range(h.shape[1])]
+
+# Parallel carry, in place: every limb moves its overflow to the next one at once
+# Each pass shrinks limbs from up to 2**63 to about 2**bits plus the incoming carry
+def carry(h,passes=1):
+    for _ in range(passes):
+        c = h >> BITS
+        h -= c << BITS
+        h[1:] += c[:-1]
+        h[0] += 19*c[-1]
+    return h
+
+# Field operations; inputs must have limbs of at most about 2**26
+def add(f,g):
+    return carry(f + g)
+
+def sub(f,g):
+    return carry(f - g)
+
+# Multiplication: h[k] = sum f[i]*g[j] over i+j = k (mod 10), where terms that
+# wrap past 2**255 pick up a factor 19, and products of two odd (25-bit) limbs
+# pick up a factor 2. Sums stay below 2**61.
+def mul(f,g):
+    # rows 10-i..19-i of `wrapped` line g up with f[i]; odd rows of `wrapped2` are doubled
+    wrapped = np.empty((20,g.shape[1]),dtype=np.int64)
+    wrapped[10:] = g
+    np.multiply(g,19,out=wrapped[:10])
+    wrapped2 = wrapped.copy()
+    wrapped2[1::2] *= 2
+    h = f[0]*wrapped[10:20]
+    temp = np.empty_like(h)
+    for i in range(1,10):
+        source = wrapped2 if i & 1 else wrapped
+        np.multiply(f[i],source[10-i:20-i],out=temp)
+        h += temp
+    return carry(h,2)
+
+def square(f):
+    return mul(f,f)
+
+# Constants as broadcastable (10,1) arrays
+def constant(x):
+    return from_ints([x])
+
+D2 = constant(dumb25519.d2)
+
+# Point operations on tuples (X,Y,Z,T) of (10,N) arrays, mirroring dumb25519.ext_add and friends
+def ext_add(P,Q):
+    X1,Y1,Z1,T1 = P
+    X2,Y2,Z2,T2 = Q
+    a = mul(sub(Y1,X1),sub(Y2,X2))
+    b = mul(add(Y1,X1),add(Y2,X2))
+    c = mul(mul(T1,D2),T2)
+    e = carry(2*mul(Z1,Z2))
+    f = sub(b,a)
+    g = sub(e,c)
+    h = add(e,c)
+    k = add(b,a)
+    return (mul(f,g),mul(h,k),mul(g,h),mul(f,k))
+
+def ext_double(P):
+    X1,Y1,Z1,_ = P
+    a = square(X1)
+    b = square(Y1)
+    c = carry(2*square(Z1))
+    e = sub(sub(square(add(X1,Y1)),a),b)
+    g = sub(b,a)
+    f = sub(g,c)
+    h = sub(-a,b)
+    return (mul(e,f),mul(g,h),mul(f,g),mul(e,h))
+
+def ext_neg(P):
+    X,Y,Z,T = P
+    return (-X,Y,Z,-T)
+
+# Pick from P where `mask` is set, and from Q elsewhere
+def ext_select(mask,P,Q):
+    return tuple(np.where(mask,A,B) for A,B in zip(P,Q))
+
+# Convert a list of dumb25519 extended points to arrays, and back
+def pack_points(points):
+    return tuple(from_ints([P[i] for P in points]) for i in range(4))
+
+def unpack_points(P):
+    return list(zip(*[to_ints(A) for A in P]))
+
+# Batch operations on lists of dumb25519 extended points
+def add_many(Ps,Qs):
+    return unpack_points(ext_add(pack_points(Ps),pack_points(Qs)))
+
+def sub_many(Ps,Qs):
+    return unpack_points(ext_add(pack_points(Ps),ext_neg(pack_points(Qs))))
+
+# Multiply each point by its own nonnegative integer (below 2**256), with a
+# shared double-and-add chain where each bit selects per point whether to add
+def mul_many(Ps,ks):
+    n = len(Ps)
+    P = pack_points(Ps)
+    data = np.frombuffer(b''.join(k.to_bytes(32,'little') for k in ks),dtype=np.uint8).reshape(n,32)
+    bits = np.unpackbits(data,axis=1,bitorder='little').astype(bool)
+    R = pack_points([(0,1,1,0)]*n)
+    started = False
+    for i in range(max(ks).bit_length()-1,-1,-1):
+        if started:
+            R = ext_double(R)
+        mask = bits[:,i]
+        if np.any(mask):
+            R = ext_select(mask,ext_add(R,P),R)
+            started = True
+    return unpack_points(R)
+
+# Multiply every point by the same nonnegative integer
+def mul_scalar_many(Ps,k):
+    P = pack_points(Ps)
+    R = None
+    for i in range(k.bit_length()-1,-1,-1):
+        if R is not None:
+            R = ext_double(R)
+        if (k >> i) & 1:
+            R = P if R is None else ext_add(R,P)
+    if R is None:
+        return [(0,1,1,0)]*len(Ps)
+    return unpack_points(R)
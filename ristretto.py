@@ -0,0 +1,128 @@
+# Ristretto255: a prime-order group on top of dumb25519 points
+#
+# Every Ristretto element is a coset P + T of edwards25519 points, where T runs over
+# the 4-torsion, and all representatives share one canonical 32-byte encoding.
+# Decoding accepts only canonical encodings and always returns a representative of
+# a prime-order element, so untrusted inputs need no `Scalar('l') * P == Z` check;
+# the cost is one square root. The representative itself may carry 4-torsion, so
+# it is often not in the main subgroup: Point `==`, `repr`, `hash_to_scalar` and
+# `subgroup_failures` can treat two decodings of the same element differently.
+# Group operations are the usual Point operations on representatives, but compare
+# with `equal` and hash or serialize with `encode`.
+#
+# Follows RFC 9496 (https://www.rfc-editor.org/rfc/rfc9496). Like dumb25519, this
+# is not constant time; use it only for prototyping.
+
+import dumb25519
+from dumb25519 import q, d, I, Point
+
+D = d % q
+SQRT_M1 = I
+
+# Whether a field element is "negative" (odd, once reduced)
+def is_negative(x):
+    return (x % q) & 1
+
+# Absolute value: the nonnegative one of x and -x
+def ct_abs(x):
+    x %= q
+    return q-x if x & 1 else x
+
+# Square root of u/v; returns (was_square, root) with a nonnegative root
+# If u/v is not a square, the root is sqrt(I*u/v) instead, as in the RFC
+def sqrt_ratio_m1(u,v):
+    u %= q
+    v %= q
+    v3 = v*v*v % q
+    r = u*v3 * dumb25519.exponent(u*v3*v3*v % q,(q-5)//8,q) % q
+    check = v*r*r % q
+    correct_sign = check == u
+    flipped_sign = check == (-u) % q
+    flipped_sign_i = check == (-u*SQRT_M1) % q
+    if flipped_sign or flipped_sign_i:
+        r = r*SQRT_M1 % q
+    return correct_sign or flipped_sign, ct_abs(r)
+
+# 1/sqrt(a-d), with a = -1
+INVSQRT_A_MINUS_D = sqrt_ratio_m1(1,-1-D)[1]
+
+# Canonical 32-byte encoding of the element represented by a Point
+def encode(P):
+    if not isinstance(P,Point):
+        raise TypeError
+    x0, y0, z0, t0 = P.ext
+    u1 = (z0 + y0)*(z0 - y0) % q
+    u2 = x0*y0 % q
+    _, invsqrt = sqrt_ratio_m1(1,u1*u2*u2)
+    den1 = invsqrt*u1 % q
+    den2 = invsqrt*u2 % q
+    z_inv = den1*den2*t0 % q
+
+    if is_negative(t0*z_inv):
+        x, y = y0*SQRT_M1 % q, x0*SQRT_M1 % q
+        den_inv = den1*INVSQRT_A_MINUS_D % q
+    else:
+        x, y = x0, y0
+        den_inv = den2
+    if is_negative(x*z_inv):
+        y = -y
+    s = ct_abs(den_inv*(z0 - y))
+    return s.to_bytes(32,'little')
+
+# Decode a canonical 32-byte encoding to a Point representing its element
+#
+# Only the coset is prime-order: the Point may differ from the main subgroup
+# point by 4-torsion, so compare results with `equal` or by encoding, not `==`.
+# Raises ValueError for non-canonical encodings and non-elements
+def decode(data):
+    if len(data) != 32:
+        raise TypeError
+    s = int.from_bytes(data,'little')
+    if s >= q or is_negative(s):
+        raise ValueError
+    ss = s*s % q
+    u1 = (1 - ss) % q
+    u2 = (1 + ss) % q
+    u2_sqr = u2*u2 % q
+    v = (-(D*u1*u1) - u2_sqr) % q
+    was_square, invsqrt = sqrt_ratio_m1(1,v*u2_sqr)
+    den_x = invsqrt*u2 % q
+    den_y = invsqrt*den_x*v % q
+    x = ct_abs(2*s*den_x)
+    y = u1*den_y % q
+    t = x*y % q
+    if not was_square or is_negative(t) or y == 0:
+        raise ValueError
+    return Point.from_extended((x,y,1,t))
+
+# Whether two Points represent the same Ristretto element
+def equal(P,Q):
+    if not isinstance(P,Point) or not isinstance(Q,Point):
+        raise TypeError
+    X1, Y1, _, _ = P.ext
+    X2, Y2, _, _ = Q.ext
+    return (X1*Y2 - Y1*X2) % q == 0 or (Y1*Y2 - X1*X2) % q == 0
+
+# Decode many encodings, returning a PointVector
+def decode_many(data):
+    return dumb25519.PointVector([decode(item) for item in data])
+
+if __name__ == '__main__':
+    # TESTING
+    P = dumb25519.random_point()
+    print("Point (Ed25519)    : " + repr(P))
+    print("Encoding (Ristretto): " + encode(P).hex())
+
+    # All representatives P + T, for T in the 4-torsion, encode the same way
+    T4 = Point.from_extended((SQRT_M1,0,1,0)) # a point of order 4
+    T = dumb25519.Z
+    encodings = set()
+    for _ in range(4):
+        encodings.add(encode(P + T))
+        T = T + T4
+    print("Distinct encodings of P + T: " + str(len(encodings)))
+
+    if len(encodings) == 1 and equal(decode(encode(P)),P):
+        print("Works like a charm!")
+    else:
+        print("Encoding is not canonical.")
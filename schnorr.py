@@ -0,0 +1,167 @@
+# Schnorr signatures in the style of Ed25519
+#
+# A signature on a message under the public key A = x*G is (R, s), where
+# R = r*G for a nonce r derived from the private key and the message, and
+# s = r + c*x for the challenge c = H(R, A, message). It is valid if
+# 8*(s*G - R - c*A) is the identity; the cofactor is cleared, so single and
+# batch verification accept exactly the same signatures.
+#
+# The hashes are dumb25519's, so signatures are not interchangeable with Ed25519.
+
+import secrets
+
+import dumb25519
+
+CHALLENGE_DOMAIN = 'dumb25519 schnorr challenge'
+NONCE_DOMAIN = 'dumb25519 schnorr nonce'
+
+# Fiat-Shamir challenge for a signature
+def challenge(R, A, message):
+    return dumb25519.hash_to_scalar(CHALLENGE_DOMAIN, R, A, message)
+
+# Check the shape of a signature
+def check_signature(signature):
+    if not isinstance(signature, tuple):
+        raise TypeError('Bad signature!')
+    if not (len(signature) == 2 and isinstance(signature[0], dumb25519.Point) and isinstance(signature[1], dumb25519.Scalar)):
+        raise TypeError('Bad signature!')
+
+# Whether a point is in the torsion subgroup, i.e. vanishes once the cofactor is cleared
+def is_torsion(P):
+    return dumb25519.ext_is_identity(dumb25519.ext_clear_cofactor(P.ext))
+
+class SchnorrPublicKey:
+    # Set up a public key
+    #
+    # INPUT
+    #   A: public key (Point)
+    def __init__(self, A):
+        if not isinstance(A, dumb25519.Point):
+            raise TypeError('Bad public key!')
+        self.A = A
+
+    # Verify a signature
+    #
+    # INPUT
+    #   message: signed message (bytes or str)
+    #   signature: signature ((Point, Scalar))
+    # RETURNS
+    #   True if the signature is valid
+    def verify(self, message, signature):
+        check_signature(signature)
+        R, s = signature
+        c = challenge(R, self.A, message)
+        return is_torsion(dumb25519.double_mul(s, dumb25519.G, -c, self.A) - R)
+
+class SchnorrPrivateKey:
+    # Set up a private key
+    #
+    # INPUT
+    #   x: private key (Scalar)
+    def __init__(self, x):
+        if not isinstance(x, dumb25519.Scalar):
+            raise TypeError('Bad private key!')
+        self.x = x
+        self.A = x * dumb25519.G
+
+    # Get the public key
+    #
+    # RETURNS
+    #   SchnorrPublicKey instance
+    def get_public(self):
+        return SchnorrPublicKey(self.A)
+
+    # Sign a message
+    #
+    # The nonce is derived from the private key and the message, so signing the
+    # same message twice gives the same signature.
+    #
+    # INPUT
+    #   message: message to sign (bytes or str)
+    # RETURNS
+    #   signature ((Point, Scalar))
+    def sign(self, message):
+        r = dumb25519.hash_to_scalar(NONCE_DOMAIN, self.x, message)
+        R = r * dumb25519.G
+        c = challenge(R, self.A, message)
+        return (R, r + c * self.x)
+
+# Verify many signatures at once
+#
+# All checks are folded into one with random 128-bit weights z, so a single
+# multiexp checks 8*((sum z*s)*G - sum z*R - sum (z*c)*A) == 0, with the
+# terms for repeated public keys merged. If that fails, the signatures are
+# split in half and each half is checked again.
+#
+# INPUT
+#   items: (SchnorrPublicKey, message, signature) triples
+# RETURNS
+#   the indices of the bad signatures (an empty list if all are valid)
+def verify_batch(items):
+    items = list(items)
+    checks = []
+    for key, message, signature in items:
+        if not isinstance(key, SchnorrPublicKey):
+            raise TypeError('Bad public key!')
+        check_signature(signature)
+        R, s = signature
+        checks.append((key.A, R, int(s), int(challenge(R, key.A, message))))
+
+    bad = []
+    pending = [list(range(len(checks)))]
+    while len(pending) > 0:
+        indices = pending.pop()
+        if len(indices) == 0 or check_combined(checks, indices):
+            continue
+        if len(indices) == 1:
+            bad.append(indices[0])
+        else:
+            half = len(indices) // 2
+            pending.append(indices[half:])
+            pending.append(indices[:half])
+    return sorted(bad)
+
+# One random linear combination of the signature checks for the given indices
+def check_combined(checks, indices):
+    s_sum = 0
+    points = [dumb25519.G]
+    scalars = [None]
+    keys = {} # public key encoding -> position in `points`
+    for i in indices:
+        A, R, s, c = checks[i]
+        z = 1 if len(indices) == 1 else secrets.randbits(128)
+        s_sum += z * s
+        points.append(R)
+        scalars.append(-z)
+        key = A.to_bytes()
+        if key in keys:
+            scalars[keys[key]] -= z * c
+        else:
+            keys[key] = len(points)
+            points.append(A)
+            scalars.append(-z * c)
+    scalars[0] = s_sum
+    result = dumb25519.multiexp(dumb25519.ScalarVector([dumb25519.Scalar(x) for x in scalars]), dumb25519.PointVector(points))
+    return is_torsion(result)
+
+if __name__ == '__main__':
+    # TESTING
+    privkeys = [SchnorrPrivateKey(dumb25519.random_scalar()) for _ in range(4)]
+    items = []
+    for i in range(16):
+        privkey = privkeys[i % len(privkeys)]
+        message = 'message %d' % i
+        items.append((privkey.get_public(), message, privkey.sign(message)))
+    print("Single verification: " + str(all(key.verify(message, signature) for key, message, signature in items)))
+
+    # Tamper with two signatures
+    key, message, (R, s) = items[3]
+    items[3] = (key, message, (R, s + dumb25519.Scalar(1)))
+    key, message, signature = items[11]
+    items[11] = (key, 'forged', signature)
+    bad = verify_batch(items)
+    print("Bad signatures     : " + str(bad))
+    if bad == [3, 11]:
+        print("Works like a charm!")
+    else:
+        print("Batch verification failed.")
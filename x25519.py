@@ -0,0 +1,143 @@
+# X25519: x-only Diffie-Hellman on Curve25519 with a Montgomery ladder
+#
+# Curve25519 (v^2 = u^3 + A*u^2 + u) is birationally equivalent to edwards25519,
+# with u = (1+y)/(1-y), so the u-coordinate of r*N can be computed from the
+# u-coordinate of N alone. Ladder steps work on projective (X:Z) pairs and need
+# no inversions; a single inversion at the end gives the affine result.
+#
+# The sign of x is lost on the way, so this is for shared secrets and public
+# keys, not for Point arithmetic. Like dumb25519, the ladder is not constant
+# time; use this code only for prototyping.
+
+import dumb25519
+from dumb25519 import q, invert, Point, Scalar
+
+A24 = (dumb25519.montgomery_A - 2) // 4 # 121665
+BASE_U = 9 # u-coordinate of G
+
+# Montgomery ladder: projective (X:Z) of k*P, given the affine u-coordinate of P
+def ladder(k,u):
+    x1 = u % q
+    x2, z2 = 1, 0
+    x3, z3 = x1, 1
+    swap = 0
+    for t in range(k.bit_length()-1,-1,-1):
+        bit = (k >> t) & 1
+        if swap ^ bit:
+            x2, x3 = x3, x2
+            z2, z3 = z3, z2
+        swap = bit
+
+        a = x2 + z2
+        aa = a*a % q
+        c = x2 - z2
+        cc = c*c % q
+        e = aa - cc
+        da = (x3 - z3)*a % q
+        cb = (x3 + z3)*c % q
+        x3 = (da + cb)**2 % q
+        z3 = x1*(da - cb)**2 % q
+        x2 = aa*cc % q
+        z2 = e*(aa + A24*e) % q
+    if swap:
+        x2, z2 = x3, z3
+    return x2, z2
+
+# Affine u-coordinate of k*P, given the u-coordinate of P; the identity maps to 0
+def mul_u(k,u):
+    x, z = ladder(k,u)
+    return x*invert(z,q) % q
+
+# Decode a 32-byte u-coordinate (the top bit is ignored)
+def decode_u(data):
+    if len(data) != 32:
+        raise TypeError
+    return (int.from_bytes(data,'little') & ((1 << 255) - 1)) % q
+
+# Encode a u-coordinate as 32 bytes
+def encode_u(u):
+    return (u % q).to_bytes(32,'little')
+
+# Decode a 32-byte X25519 private key: clear the low three bits and the top bit, set bit 254
+def clamp(data):
+    if len(data) != 32:
+        raise TypeError
+    k = int.from_bytes(data,'little')
+    k &= ~7
+    k &= (1 << 255) - 1
+    k |= 1 << 254
+    return k
+
+# The X25519 function on 32-byte strings
+#
+# INPUT
+#   k: private key (32 bytes)
+#   u: public key or base u-coordinate (32 bytes)
+# RETURNS
+#   u-coordinate of the product (32 bytes)
+def x25519(k,u):
+    return encode_u(mul_u(clamp(k),decode_u(u)))
+
+# X25519 public key for a private key
+def public_key(k):
+    return x25519(k,encode_u(BASE_U))
+
+# Conversions between dumb25519 Points and u-coordinates
+
+# u-coordinate of a Point, as (Z+Y)/(Z-Y) with one inversion; the identity maps to 0
+def u_from_point(P):
+    if not isinstance(P,Point):
+        raise TypeError
+    _, Y, Z, _ = P.ext
+    return (Z + Y)*invert(Z - Y,q) % q
+
+# 32-byte u-coordinate encoding of a Point
+def point_to_u_bytes(P):
+    return encode_u(u_from_point(P))
+
+# The Point with u-coordinate `u` and the given parity of x (0 or 1)
+#
+# Raises ValueError if `u` is -1 or not on the curve (it is then on the twist)
+def point_from_u(u,sign=0):
+    u %= q
+    if u == q-1:
+        raise ValueError
+    y = (u - 1)*invert(u + 1,q) % q
+    return Point.from_bytes((y | (sign << 255)).to_bytes(32,'little'))
+
+# The Point for a 32-byte u-coordinate encoding, as in `point_from_u`
+def point_from_u_bytes(data,sign=0):
+    return point_from_u(decode_u(data),sign)
+
+# Shared secret for a dumb25519 key pair: the 32-byte u-coordinate of r*N
+#
+# This equals `point_to_u_bytes(r*N)` at a fraction of the cost, since only the
+# ladder and two inversions are needed
+#
+# INPUT
+#   r: private scalar (Scalar)
+#   N: public key (Point)
+# RETURNS
+#   u-coordinate of r*N (32 bytes)
+def shared_secret(r,N):
+    if not isinstance(r,Scalar) or not isinstance(N,Point):
+        raise TypeError
+    return encode_u(mul_u(r.x,u_from_point(N)))
+
+if __name__ == '__main__':
+    # TESTING
+    r = dumb25519.random_scalar()
+    s = dumb25519.random_scalar()
+    R = r*dumb25519.G
+    S = s*dumb25519.G
+    print("Alice public (u): " + point_to_u_bytes(R).hex())
+    print("Bob public (u)  : " + point_to_u_bytes(S).hex())
+
+    alice = shared_secret(r,S)
+    bob = shared_secret(s,R)
+    print("\nAlice shared    : " + alice.hex())
+    print("Bob shared      : " + bob.hex())
+    if alice == bob == point_to_u_bytes(r*s*dumb25519.G):
+        print("Works like a charm!")
+    else:
+        print("Shared secrets differ.")